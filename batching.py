@@ -0,0 +1,132 @@
+# Micro-batched layout detection.
+#
+# detect_batch() runs the Detectron2 model of a layoutparser
+# Detectron2LayoutModel on several images in one forward pass. MicroBatcher
+# lets independent callers (threads) share those batches: requests are
+# collected until `max_batch` images are waiting or `max_wait` seconds have
+# passed since the first one, then run together and the results handed back
+# to each caller.
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+
+def _predictor_parts(detector):
+    """(DefaultPredictor, network) of a Detectron2LayoutModel, or (None, None)."""
+    predictor = getattr(detector, "model", None)
+    network = getattr(predictor, "model", None)
+    if network is None or not hasattr(predictor, "aug") or not hasattr(detector, "gather_output"):
+        return None, None
+    return predictor, network
+
+
+def detect_batch(detector, images):
+    """
+    Layouts for a list of PIL images, in order. Same preprocessing as
+    DefaultPredictor.__call__, but all images go through the network in one
+    call. Detectors without a batchable Detectron2 predictor are run one
+    image at a time.
+    """
+    predictor, network = _predictor_parts(detector)
+    if predictor is None or len(images) < 2:
+        return [detector.detect(img) for img in images]
+
+    import torch
+
+    inputs = []
+    for img in images:
+        if hasattr(detector, "_reformat_input"):
+            original = detector._reformat_input(img)
+        else:
+            original = np.asarray(img.convert("RGB"))
+        if predictor.input_format == "RGB":
+            original = original[:, :, ::-1]
+        height, width = original.shape[:2]
+        resized = predictor.aug.get_transform(original).apply_image(original)
+        tensor = torch.as_tensor(resized.astype("float32").transpose(2, 0, 1))
+        inputs.append({"image": tensor, "height": height, "width": width})
+
+    with torch.no_grad():
+        outputs = network(inputs)
+
+    return [detector.gather_output(output) for output in outputs]
+
+
+class MicroBatcher:
+    """
+    Collects submit()ted items on a background thread and runs
+    `batch_fn(items) -> results` on up to `max_batch` items at a time,
+    waiting at most `max_wait` seconds for a batch to fill up. submit()
+    returns a Future for the item's own result.
+    """
+
+    def __init__(self, batch_fn, max_batch=8, max_wait=0.05):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # finish this batch, stop on the next round
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,92 @@
+# Throughput of batched table detection across batch sizes.
+#
+# Rasterizes the pages of a scanned PDF (or loads a folder of images), warms
+# the detector up, then times batching.detect_batch over all pages for each
+# batch size. With --end-to-end it also times process_pdf(batch_size=...),
+# which includes rasterization and OCR.
+#
+# python benchmark_batching.py --pdf scanned.pdf --batch-sizes 1,2,4,8
+
+import os
+import time
+import argparse
+import contextlib
+import io
+from PIL import Image
+
+from batching import detect_batch
+from model_registry import registry, table_detector
+from pdf_processor import PageRasterizer, process_pdf
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+
+def load_images(pdf_path=None, image_dir=None, max_pages=None, dpi=200):
+    if pdf_path:
+        with PageRasterizer(pdf_path, dpi) as rasterizer:
+            n = len(rasterizer) if max_pages is None else min(max_pages, len(rasterizer))
+            return [rasterizer.render(i) for i in range(n)]
+
+    names = sorted(n for n in os.listdir(image_dir) if n.lower().endswith(IMAGE_EXTENSIONS))
+    return [Image.open(os.path.join(image_dir, n)).convert("RGB") for n in names[:max_pages]]
+
+
+def time_detection(images, batch_size, repeat=3):
+    detector = table_detector()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(0, len(images), batch_size):
+            detect_batch(detector, images[i:i + batch_size])
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_end_to_end(pdf_path, batch_size, dpi=200):
+    start = time.perf_counter()
+    # silence per-page progress output
+    with contextlib.redirect_stdout(io.StringIO()):
+        pages = len(process_pdf(pdf_path, dpi=dpi, batch_size=batch_size))
+    return time.perf_counter() - start, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched table detection.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pdf", help="Scanned PDF whose pages are used as input")
+    source.add_argument("--images", help="Folder of page images")
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16")
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--end-to-end", action="store_true", help="Also time process_pdf (needs --pdf)")
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    images = load_images(args.pdf, args.images, args.max_pages, args.dpi)
+    print(f"{len(images)} images")
+
+    registry.warm_up(["table_detector"])
+    # first forward passes allocate buffers, keep them out of the timings
+    detect_batch(table_detector(), images[:max(batch_sizes)])
+
+    baseline = None
+    print(f"{'batch':>6} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+    for batch_size in batch_sizes:
+        seconds = time_detection(images, batch_size, args.repeat)
+        baseline = baseline or seconds
+        print(f"{batch_size:>6} {seconds:>9.2f} {len(images) / seconds:>9.2f} {baseline / seconds:>7.2f}x")
+
+    if args.end_to_end and args.pdf:
+        print("\nEnd to end (process_pdf)")
+        baseline = None
+        for batch_size in batch_sizes:
+            seconds, pages = time_end_to_end(args.pdf, batch_size, args.dpi)
+            baseline = baseline or seconds
+            print(f"{batch_size:>6} {seconds:>9.2f} {pages / seconds:>9.2f} {baseline / seconds:>7.2f}x")
+
+    for name, stats in registry.stats().items():
+        print(f"{name}: loaded in {stats['load_seconds']:.1f}s, RSS after load {stats['rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# Speed / accuracy of the preprocessing stage (preprocess.py) before OCR.
+#
+# The sample PDFs have a text layer, which is the ground truth. Each page is
+# rendered like a phone capture (high DPI, rotated by --skews degrees, some
+# sensor noise), then every preprocessing variant is timed per step and the
+# text OCR run on its output. Accuracy is the share of ground-truth words
+# found in the OCR text; the skew error is how far the detected angle is
+# from the applied one. --no-ocr times the preprocessing only.
+#
+# python benchmark_preprocess.py --pdf Payslip_Prakash.pdf --skews 0,3
+# python benchmark_preprocess.py --no-ocr
+
+import re
+import time
+import argparse
+from collections import Counter
+
+import numpy as np
+import pdfplumber
+from PIL import Image
+
+from preprocess import PreprocessOptions, preprocess_image
+from pdf_processor import PageRasterizer
+
+VARIANTS = {
+    "raw": None,
+    "downscale": PreprocessOptions(grayscale=False, deskew=False),
+    "+gray": PreprocessOptions(deskew=False),
+    "+deskew": PreprocessOptions(),
+    "+otsu": PreprocessOptions(binarize="otsu"),
+    "+adaptive": PreprocessOptions(binarize="adaptive"),
+}
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def words(text):
+    return Counter(WORD.findall(text.lower()))
+
+
+def word_recall(truth, text):
+    """Share of the ground-truth words (with multiplicity) present in `text`."""
+    if not truth:
+        return 0.0
+    return sum((truth & words(text)).values()) / sum(truth.values())
+
+
+def capture(img, skew, noise, seed=0):
+    """`img` as a skewed, noisy photo of the page."""
+    img = img.rotate(skew, resample=Image.BILINEAR, expand=True, fillcolor="white")
+    if noise:
+        rng = np.random.default_rng(seed)
+        arr = np.asarray(img, dtype=np.float32) + rng.normal(0, noise, (img.height, img.width, 1))
+        img = Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+    return img
+
+
+def ocr_text(img):
+    # same call and result handling as pdf_processor.ocr_page
+    from model_registry import text_ocr
+    result = text_ocr().ocr(img) or []
+    return "\n".join([line[1][0] for line in result])
+
+
+def load_pages(pdf_paths, capture_dpi, max_pages=None):
+    """(name, ground-truth words, rendered page) of every page with a text layer."""
+    pages = []
+    for pdf_path in pdf_paths:
+        with pdfplumber.open(pdf_path) as pdf, PageRasterizer(pdf_path, capture_dpi) as rasterizer:
+            for i, page in enumerate(pdf.pages[:max_pages]):
+                truth = words(page.extract_text() or "")
+                if truth:
+                    pages.append((f"{pdf_path}#{i + 1}", truth, rasterizer.render(i)))
+    return pages
+
+
+def run_variant(img, options, skew, repeat, with_ocr, truth):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if options is None:
+            out, report = img, {"skew_angle": 0.0, "seconds": {}}
+        else:
+            out, report = preprocess_image(img, options)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[0]:
+            best = (seconds, out, report)
+    seconds, out, report = best
+
+    row = {
+        "size": f"{out.width}x{out.height}",
+        "prep": seconds,
+        "steps": report["seconds"],
+        # a capture rotated by `skew` is straightened by -skew
+        "skew_err": abs(report["skew_angle"] + skew) if options is not None and options.deskew else None,
+    }
+    if with_ocr:
+        start = time.perf_counter()
+        text = ocr_text(out)
+        row["ocr"] = time.perf_counter() - start
+        row["recall"] = word_recall(truth, text)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing before OCR.")
+    parser.add_argument("--pdf", action="append", help="PDF with a text layer (repeatable)")
+    parser.add_argument("--capture-dpi", type=int, default=480, help="Resolution of the simulated photo")
+    parser.add_argument("--skews", default="0,3", help="Comma separated rotation angles in degrees")
+    parser.add_argument("--noise", type=float, default=8.0, help="Std. dev. of the added pixel noise")
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-ocr", action="store_true", help="Time preprocessing only")
+    args = parser.parse_args()
+
+    pdf_paths = args.pdf or ["Payslip_Prakash.pdf"]
+    skews = [float(s) for s in args.skews.split(",")]
+    variants = [v for v in args.variants.split(",") if v]
+    with_ocr = not args.no_ocr
+
+    pages = load_pages(pdf_paths, args.capture_dpi, args.max_pages)
+    if with_ocr:
+        # keep model loading out of the first timing
+        ocr_text(Image.new("RGB", (64, 64), "white"))
+
+    header = f"{'variant':>10} {'size':>10} {'prep ms':>8} {'skew err':>8}"
+    if with_ocr:
+        header += f" {'ocr s':>7} {'total s':>8} {'recall':>7}"
+
+    for name, truth, page_img in pages:
+        for skew in skews:
+            img = capture(page_img, skew, args.noise)
+            print(f"\n{name}: {img.width}x{img.height}, skew {skew:g} deg, {sum(truth.values())} words")
+            print(header)
+            steps = {}
+            for variant in variants:
+                row = run_variant(img, VARIANTS[variant], skew, args.repeat, with_ocr, truth)
+                steps[variant] = row["steps"]
+                skew_err = "-" if row["skew_err"] is None else f"{row['skew_err']:.2f}"
+                line = f"{variant:>10} {row['size']:>10} {row['prep'] * 1000:>8.1f} {skew_err:>8}"
+                if with_ocr:
+                    line += f" {row['ocr']:>7.2f} {row['prep'] + row['ocr']:>8.2f} {row['recall']:>7.1%}"
+                print(line)
+
+            print("per step (ms):")
+            for variant in variants:
+                if steps[variant]:
+                    parts = ", ".join(f"{step} {s * 1000:.1f}" for step, s in steps[variant].items()
+                                      if step != "total")
+                    print(f"{variant:>10}  {parts}")
+
+
+if __name__ == "__main__":
+    main()
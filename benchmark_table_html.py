@@ -0,0 +1,78 @@
+# table_html.extract_key_value_pairs vs the previous BeautifulSoup version.
+#
+# Builds synthetic PP-Structure table results of several sizes (no spans, so
+# both parsers must agree), checks that the outputs match and prints the
+# time per table for each.
+#
+# python benchmark_table_html.py --sizes 5x4,20x6,60x10
+
+import random
+import timeit
+import argparse
+
+from table_html import extract_key_value_pairs
+
+CELL_TEXT = ["Name", "Amount", "1,250.00", "Basic Salary", "OT &amp; Allowance", "Total", "", "12-10-2025"]
+
+def bs4_extract_key_value_pairs(table_data):
+    """The BeautifulSoup implementation previously in pdf_processor.py / image_table_ocr.py."""
+    final_tables = []
+
+    for entry in table_data:
+        if "html" not in entry:
+            continue
+
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(entry["html"], "html.parser")
+
+        rows = []
+        for tr in soup.find_all("tr"):
+            cols = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
+            if cols:
+                rows.append(cols)
+
+        if not rows:
+            continue
+
+        header = rows[0]
+        kv_list = []
+        for row in rows[1:]:
+            kv_list.append(dict(zip(header, row)))
+
+        final_tables.append(kv_list)
+
+    return final_tables
+
+
+def make_result(n_rows, n_cols, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for r in range(n_rows):
+        tag = "th" if r == 0 else "td"
+        cells = "".join(f"<{tag}>{rng.choice(CELL_TEXT)}</{tag}>" for _ in range(n_cols))
+        rows.append(f"<tr>{cells}</tr>")
+    html = "<html><body><table>" + "".join(rows) + "</table></body></html>"
+    return [{"type": "table", "bbox": [0, 0, 100, 100], "html": html}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark table HTML parsing.")
+    parser.add_argument("--sizes", default="5x4,20x6,60x10", help="Comma separated ROWSxCOLS")
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'table':>8} {'bs4 us':>10} {'new us':>10} {'speedup':>8}")
+    for size in args.sizes.split(","):
+        n_rows, n_cols = (int(x) for x in size.lower().split("x"))
+        result = make_result(n_rows, n_cols)
+        assert extract_key_value_pairs(result) == bs4_extract_key_value_pairs(result)
+
+        old = min(timeit.repeat(lambda: bs4_extract_key_value_pairs(result), number=args.number, repeat=3))
+        new = min(timeit.repeat(lambda: extract_key_value_pairs(result), number=args.number, repeat=3))
+        old_us = old / args.number * 1e6
+        new_us = new / args.number * 1e6
+        print(f"{size:>8} {old_us:>10.1f} {new_us:>10.1f} {old_us / new_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
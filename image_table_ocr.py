@@ -1,68 +1,237 @@
+import os
 import json
-import layoutparser as lp
+import glob
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
 from PIL import Image
-from paddleocr import PaddleOCR
-
-# Load OCR models
-ocr_table = PaddleOCR(show_log=False, structure=True)
-table_detector = lp.Detectron2LayoutModel(
-    "lp://TableBank/faster_rcnn_R_50_FPN",
-    extra_config={"MODEL.ROI_HEADS.SCORE_THRESH_TEST": 0.5},
-    label_map={0: "Table"}
-)
-
-def extract_key_value_pairs(table_data):
-    # Convert PaddleOCR PP-Structure result into key-value pairs from image.
-    final_tables = []
-    for entry in table_data:
-        if "html" not in entry:
-            continue
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(entry["html"], "html.parser")
-        rows = []
-        for tr in soup.find_all("tr"):
-            cols = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
-            if cols:
-                rows.append(cols)
-
-        if not rows:
-            continue
-        header = rows[0]
-        kv_list = [
-            dict(zip(header, row))
-            for row in rows[1:]
-        ]
-        final_tables.append(kv_list)
-
-    return final_tables
-
-def extract_table_from_image(img_path):
-    img = Image.open(img_path).convert("RGB")
+
+# OCR models are shared with pdf_processor.py and loaded on first use
+from model_registry import registry, text_ocr, table_ocr, table_detector
+from table_crops import CropOptions, table_bboxes, ocr_table_regions, mask_regions
+from batching import MicroBatcher, detect_batch
+from table_html import extract_key_value_pairs
+from jsonl_output import JsonlPageWriter, read_complete_lines, json_default
+from preprocess import PreprocessOptions, BINARIZE_METHODS, preprocess_image
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+
+
+def load_image(img_path, preprocess=None):
+    """
+    RGB image of `img_path`, run through preprocess.preprocess_image when
+    `preprocess` (PreprocessOptions) is given. Returns (image, report or None).
+    """
+    img = Image.open(img_path)
+    if preprocess is None:
+        return img.convert("RGB"), None
+    return preprocess_image(img, preprocess)
+
+
+def extract_table_from_image(img_path, options=CropOptions(), batcher=None, instance=0, preprocess=None):
+    """
+    `batcher` is an optional batching.MicroBatcher around detect_batch, so
+    concurrent callers share detection batches. `instance` selects the
+    registry model copies, so concurrent callers must pass distinct values.
+    With `preprocess` the image is downscaled / deskewed / binarized first;
+    table boxes are then in preprocessed coordinates and the result carries
+    the preprocessing report.
+    """
+    img, report = load_image(img_path, preprocess)
 
     # Detect table region
-    layout = table_detector.detect(img)
+    if batcher is not None:
+        layout = batcher.submit(img).result()
+    else:
+        layout = table_detector(instance).detect(img)
+    return _ocr_detected(img, layout, options, instance, report)
+
+
+def extract_tables_from_images(img_paths, options=CropOptions(), batch_size=8, preprocess=None):
+    """
+    extract_table_from_image for many images, running table detection on
+    `batch_size` images per forward pass. Results are in input order.
+    """
+    results = []
+    for start in range(0, len(img_paths), batch_size):
+        loaded = [load_image(p, preprocess) for p in img_paths[start:start + batch_size]]
+        layouts = detect_batch(table_detector(), [img for img, _ in loaded])
+        results.extend(_ocr_detected(img, layout, options, report=report)
+                       for (img, report), layout in zip(loaded, layouts))
+    return results
+
+
+def _ocr_detected(img, layout, options, instance=0, report=None):
     tables = [b for b in layout if b.type == "Table"]
 
     if not tables:
-        return {"type": "no_table", "message": "No table detected in image"}
+        output = {"type": "no_table", "message": "No table detected in image"}
+        if report is not None:
+            output["preprocess"] = report
+        return output
 
-    # Extract full structured table
-    result = ocr_table.ocr(img, cls=True)
+    # Structure OCR on the (padded) table crops only
+    boxes = table_bboxes(tables, img.size, options.padding)
+    result = ocr_table_regions(
+        img, boxes,
+        lambda worker: table_ocr(instance * options.workers + worker),
+        options.workers,
+    )
 
     kv = extract_key_value_pairs(result)
 
-    return {
+    output = {
         "type": "table",
+        "table_bboxes": [list(b) for b in boxes],
         "raw_ocr": result,
         "key_value_pairs": kv
     }
+    if options.ocr_remainder:
+        remainder = text_ocr(instance).ocr(mask_regions(img, boxes)) or []
+        output["remainder_text"] = "\n".join([line[1][0] for line in remainder])
+    if report is not None:
+        output["preprocess"] = report
+    return output
+
+
+# ---------- DIRECTORY BATCH MODE ----------
+def list_images(source):
+    """Image files of a directory (sorted, not recursive) or of a glob pattern."""
+    if os.path.isdir(source):
+        with os.scandir(source) as entries:
+            paths = [e.path for e in entries if e.is_file() and e.name.lower().endswith(IMAGE_EXTENSIONS)]
+    else:
+        paths = [p for p in glob.glob(source, recursive=True) if p.lower().endswith(IMAGE_EXTENSIONS)]
+    return sorted(paths)
+
+
+def latency_summary(latencies):
+    if not latencies:
+        return {}
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(max(latencies))}
 
+
+def process_images(source, out_path, workers=1, options=CropOptions(), batch_size=1, max_wait=0.05,
+                   raw_ocr="off", resume=True, preprocess=None):
+    """
+    Run extract_table_from_image over every image of `source` (directory or
+    glob) with `workers` threads, appending one JSON line per image to
+    `out_path` as soon as it is done. Models are loaded once up front and
+    stay warm for the whole run; each worker uses its own model copies, or
+    with batch_size > 1 all workers share one detection MicroBatcher.
+    With `resume`, images already written successfully are skipped.
+    `preprocess` (PreprocessOptions) is applied to every image.
+    Returns images/sec and latency percentiles (seconds).
+    """
+    paths = list_images(source)
+    if resume:
+        done = {r.get("image") for r in read_complete_lines(out_path) if r.get("type") != "error"}
+        paths = [p for p in paths if p not in done]
+    elif os.path.exists(out_path):
+        os.remove(out_path)
+    print(f"{len(paths)} images to process")
+
+    # the batcher runs detection on instance 0 only
+    registry.warm_up(["table_detector"], instances=1 if batch_size > 1 else workers)
+    registry.warm_up(["ocr_table"], instances=workers * options.workers)
+    if options.ocr_remainder:
+        registry.warm_up(["ocr_text"], instances=workers)
+
+    batcher = None
+    if batch_size > 1:
+        batcher = MicroBatcher(lambda images: detect_batch(table_detector(), images), batch_size, max_wait)
+
+    def run(worker_index, path):
+        start = time.perf_counter()
+        try:
+            result = extract_table_from_image(path, options, batcher, worker_index, preprocess)
+        except Exception as e:
+            result = {"type": "error", "error": str(e)}
+        seconds = time.perf_counter() - start
+        return {"image": path, "seconds": round(seconds, 4), **result}
+
+    latencies = []
+    start = time.perf_counter()
+    free_workers = list(range(workers))
+    in_flight = {}
+    remaining = iter(paths)
+
+    with JsonlPageWriter(out_path, raw_ocr, key="image") as writer, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            # one image per worker in flight, each worker keeps its model instance
+            while free_workers:
+                path = next(remaining, None)
+                if path is None:
+                    break
+                worker_index = free_workers.pop()
+                in_flight[executor.submit(run, worker_index, path)] = worker_index
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                free_workers.append(in_flight.pop(future))
+                entry = future.result()
+                writer.write(entry)
+                latencies.append(entry["seconds"])
+                if entry["type"] == "error":
+                    print(f"Failed: {entry['image']}: {entry['error']}")
+
+    if batcher is not None:
+        batcher.close()
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "images": len(latencies),
+        "seconds": elapsed,
+        "images_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+    }
+    lat = report["latency"]
+    print(f"Processed {report['images']} images in {elapsed:.1f}s ({report['images_per_sec']:.2f} images/sec)")
+    if lat:
+        print(f"Latency p50 {lat['p50']:.2f}s, p90 {lat['p90']:.2f}s, p99 {lat['p99']:.2f}s, max {lat['max']:.2f}s")
+    return report
+
+
+# ---------- RUN ----------
 if __name__ == "__main__":
-    img_path = "table_image.jpg"
+    parser = argparse.ArgumentParser(description="Extract tables from one image, a folder or a glob of images.")
+    parser.add_argument("source", nargs="?", default="table_image.jpg", help="Image file, directory or glob")
+    parser.add_argument("--output", default=None,
+                        help="image_table_output.json for one image, results.jsonl otherwise")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=1, help="Images per detection batch")
+    parser.add_argument("--padding", type=int, default=10, help="Pixels around each table crop")
+    parser.add_argument("--crop-workers", type=int, default=1, help="Table crops OCR'd concurrently per image")
+    parser.add_argument("--ocr-remainder", action="store_true", help="Also OCR text outside the tables")
+    parser.add_argument("--raw-ocr", choices=["off", "sidecar", "inline"], default="off")
+    parser.add_argument("--no-resume", action="store_true")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="Downscale, grayscale and deskew images before detection")
+    parser.add_argument("--target-dpi", type=int, default=200, help="Resolution cap with --preprocess")
+    parser.add_argument("--binarize", choices=BINARIZE_METHODS, default=None, help="Threshold with --preprocess")
+    args = parser.parse_args()
+
+    options = CropOptions(args.padding, args.crop_workers, args.ocr_remainder)
+    preprocess = None
+    if args.preprocess:
+        preprocess = PreprocessOptions(target_dpi=args.target_dpi, binarize=args.binarize)
 
-    output = extract_table_from_image(img_path)
+    if os.path.isfile(args.source):
+        out_path = args.output or "image_table_output.json"
+        output = extract_table_from_image(args.source, options, preprocess=preprocess)
 
-    with open("image_table_output.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=4, ensure_ascii=False)
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=4, ensure_ascii=False, default=json_default)
 
-    print("DONE. Saved to image_table_output.json")
+        print(f"DONE. Saved to {out_path}")
+    else:
+        out_path = args.output or "results.jsonl"
+        process_images(args.source, out_path, workers=args.workers, options=options,
+                       batch_size=args.batch_size, raw_ocr=args.raw_ocr, resume=not args.no_resume,
+                       preprocess=preprocess)
+        print(f"DONE. Results in {out_path}")
@@ -0,0 +1,108 @@
+# Streaming JSON Lines output for page results.
+#
+# One compact JSON object per line, appended and flushed as each page
+# finishes, so a crash loses at most the page being written and a rerun can
+# resume after the last complete line. The bulky `raw_ocr` payload can be
+# kept inline, dropped, or written to a gzip sidecar file per page.
+
+import os
+import gzip
+import json
+import hashlib
+
+RAW_OCR_MODES = ("inline", "off", "sidecar")
+
+
+def json_default(obj):
+    """numpy arrays / scalars (PP-Structure returns them) as plain JSON values."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+def read_complete_lines(path):
+    """
+    Records of every complete line of `path`. A partial last line, left by
+    a crash mid-write, is cut off the file.
+    """
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    good_size = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            good_size += len(line)
+
+    if good_size < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_size)
+    return records
+
+
+def last_written_page(path):
+    """Page number of the last complete line of `path` (0 if there is none)."""
+    pages = [r["page"] for r in read_complete_lines(path) if isinstance(r, dict) and "page" in r]
+    return pages[-1] if pages else 0
+
+
+class JsonlPageWriter:
+    """
+    Appends page results to `path` as JSON Lines.
+
+    raw_ocr="inline" keeps the payload in the line, "off" drops it and
+    "sidecar" writes it to <path>.raw/<key>_<value>.json.gz and stores that
+    relative path as `raw_ocr_file`. `key` is the field identifying a record
+    ("page" for PDF pages, "image" for image paths, which are hashed).
+    """
+
+    def __init__(self, path, raw_ocr="off", key="page"):
+        if raw_ocr not in RAW_OCR_MODES:
+            raise ValueError(f"raw_ocr must be one of {RAW_OCR_MODES}")
+        self.path = path
+        self.raw_ocr = raw_ocr
+        self.key = key
+        self.sidecar_dir = path + ".raw"
+        self.pages = 0
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, entry):
+        if "raw_ocr" in entry and self.raw_ocr != "inline":
+            entry = dict(entry)
+            raw = entry.pop("raw_ocr")
+            if self.raw_ocr == "sidecar":
+                entry["raw_ocr_file"] = self._write_sidecar(entry[self.key], raw)
+
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=json_default))
+        self._file.write("\n")
+        self._file.flush()
+        self.pages += 1
+
+    def _write_sidecar(self, value, raw):
+        os.makedirs(self.sidecar_dir, exist_ok=True)
+        if isinstance(value, int):
+            name = f"{self.key}_{value:04d}.json.gz"
+        else:
+            name = f"{self.key}_{hashlib.sha1(str(value).encode()).hexdigest()[:16]}.json.gz"
+        tmp_path = os.path.join(self.sidecar_dir, name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False, default=json_default)
+        os.replace(tmp_path, os.path.join(self.sidecar_dir, name))
+        return os.path.join(os.path.basename(self.sidecar_dir), name)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,122 @@
+# Shared, lazily loaded OCR / layout models.
+#
+# Nothing heavy is imported or built until a model is first requested, so
+# text-only PDFs never pay the PaddleOCR / Detectron2 startup cost. Each
+# model is built once per process and shared by pdf_processor.py and
+# image_table_ocr.py.
+
+import os
+import time
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB (None if it cannot be read)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ModelRegistry:
+    """
+    name -> factory. get() builds the model on first use (once, even when
+    several threads ask at the same time) and records how long loading took
+    and how much resident memory it added.
+
+    Models are not assumed to be thread-safe: callers that run inference
+    concurrently ask for distinct `instance` numbers and get one copy each.
+    Instance 0 is the shared default.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        with self._lock:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+
+    def get(self, name, instance=0):
+        key = (name, instance)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            if key not in self._models:
+                label = self._label(name, instance)
+                rss_before = current_rss_mb()
+                start = time.perf_counter()
+                self._models[key] = self._factories[name]()
+                rss_after = current_rss_mb()
+                self._stats[label] = {
+                    "load_seconds": time.perf_counter() - start,
+                    "rss_mb": rss_after,
+                    "rss_delta_mb": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+                }
+                print(f"Loaded model '{label}' in {self._stats[label]['load_seconds']:.1f}s")
+        return self._models[key]
+
+    @staticmethod
+    def _label(name, instance):
+        return name if instance == 0 else f"{name}#{instance}"
+
+    def is_loaded(self, name, instance=0):
+        return (name, instance) in self._models
+
+    def warm_up(self, names=None, instances=1):
+        """Load the given models (all registered ones by default) up front."""
+        for name in (names or list(self._factories)):
+            for instance in range(instances):
+                self.get(name, instance)
+        return self.stats()
+
+    def stats(self):
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+# ---------- MODEL FACTORIES ----------
+def _paddle_text_ocr():
+    from paddleocr import PaddleOCR
+    return PaddleOCR(show_log=False)
+
+def _paddle_table_ocr():
+    from paddleocr import PaddleOCR
+    return PaddleOCR(show_log=False, structure=True)
+
+def _table_detector():
+    import layoutparser as lp
+    return lp.Detectron2LayoutModel(
+        "lp://TableBank/faster_rcnn_R_50_FPN",
+        extra_config={"MODEL.ROI_HEADS.SCORE_THRESH_TEST": 0.5},
+        label_map={0: "Table"}
+    )
+
+
+registry = ModelRegistry()
+registry.register("ocr_text", _paddle_text_ocr)
+registry.register("ocr_table", _paddle_table_ocr)
+registry.register("table_detector", _table_detector)
+
+def text_ocr(instance=0):
+    return registry.get("ocr_text", instance)
+
+def table_ocr(instance=0):
+    return registry.get("ocr_table", instance)
+
+def table_detector(instance=0):
+    return registry.get("table_detector", instance)
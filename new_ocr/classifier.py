@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+import fitz
+
+class PDFClassifier:
+    """
+    Decide whether a PDF is a scanned (image-only) document.
+
+    Pages are read one at a time and the scan stops as soon as the verdict is
+    certain: enough text/words means "text", and, with `stop_on_image_page`,
+    a page carrying images but no text means "image". `max_pages` limits the
+    scan to the first N pages. Verdicts are cached by SHA-256 of the file
+    content, optionally persisted to `cache_path` as JSON.
+    """
+
+    def __init__(self, text_threshold=50, word_threshold=20, max_pages=None,
+                 stop_on_image_page=True, cache_path=None):
+        self.text_threshold = text_threshold
+        self.word_threshold = word_threshold
+        self.max_pages = max_pages
+        self.stop_on_image_page = stop_on_image_page
+        self.cache_path = cache_path
+        self.cache = {}
+
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+
+    def is_image(self, pdf, text_threshold=None, word_threshold=None):
+        """`pdf` is a file path or the PDF bytes."""
+        text_threshold = self.text_threshold if text_threshold is None else text_threshold
+        word_threshold = self.word_threshold if word_threshold is None else word_threshold
+
+        if isinstance(pdf, (bytes, bytearray)):
+            content = bytes(pdf)
+        else:
+            with open(pdf, "rb") as f:
+                content = f.read()
+
+        key = "{}:{}:{}:{}:{}".format(
+            hashlib.sha256(content).hexdigest(), text_threshold, word_threshold,
+            self.max_pages, int(self.stop_on_image_page)
+        )
+        if key in self.cache:
+            return self.cache[key]
+
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            verdict = self._classify(doc, text_threshold, word_threshold)
+
+        self.cache[key] = verdict
+        return verdict
+
+    def _classify(self, doc, text_threshold, word_threshold):
+        text_len = 0
+        word_count = 0
+        image_found = False
+
+        for page_index, page in enumerate(doc):
+            if self.max_pages is not None and page_index >= self.max_pages:
+                break
+
+            text = page.get_text().strip()
+            if text:
+                # pages are joined with a single space, as in the original check
+                text_len += len(text) + (1 if text_len else 0)
+                word_count += len(text.split())
+
+            has_images = bool(page.get_images())
+            image_found = image_found or has_images
+
+            # Text only grows, so once both thresholds are met the answer is final
+            if text_len >= text_threshold and word_count >= word_threshold:
+                return False
+
+            if self.stop_on_image_page and has_images and not text:
+                return True
+
+        return image_found and (text_len < text_threshold or word_count < word_threshold)
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f)
@@ -1,27 +1,150 @@
-from pymongo import MongoClient
-from datetime import datetime
-
-class MongoDB:
-    def __init__(self, uri= "mongodb://localhost:27021/",db_name = "PDF_OCR"):
-        self.client = MongoClient(uri)
-        self.db = self.client[db_name]
-        self.collection = self.db["employee_records"]
-
-    def insert_record(self, timesheet_data, payslip_data, ts_file, ps_file):
-        employee_id =  timesheet_data.get("IDENTIFIER") or payslip_data.get("PAYSLIP_BADGE")
-
-        record = {
-            "employee_id" : employee_id,
-            "employee_name" : timesheet_data.get("NAME") or payslip_data.get("PAYSLIP_NAME"),
-
-            "timesheet": timesheet_data,
-            "payslip" : payslip_data,
-
-            "source_files" :{
-                "timesheet_pdf" : ts_file,
-                "payslip_pdf" : ps_file
-            },
-
-            "created_at" :datetime.now()
-            }
-        return self.collection.insert_one(record)
\ No newline at end of file
+import os
+import time
+import atexit
+import hashlib
+import pandas as pd
+from bson.errors import InvalidDocument
+from pymongo import MongoClient, UpdateOne, IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+from datetime import datetime
+
+def file_hash(path):
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def bson_value(value):
+    """
+    `value` with everything BSON cannot encode made plain: pd.NA / NaT / NaN
+    become None and numpy scalars Python values, in nested dicts and lists too.
+    """
+    if isinstance(value, dict):
+        return {str(k): bson_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [bson_value(v) for v in value]
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if hasattr(value, "item") and not isinstance(value, datetime):
+        return value.item()
+    return value
+
+class MongoDB:
+    def __init__(self, uri= "mongodb://localhost:27021/",db_name = "PDF_OCR", client=None,
+                 batch_size=500, max_age=5.0):
+        self.client = client or MongoClient(uri)
+        self.db = self.client[db_name]
+        self.collection = self.db["employee_records"]
+
+        # Records are buffered and written with unordered bulk upserts,
+        # flushed every `batch_size` records or when the oldest is `max_age` seconds old.
+        # There is no timer: the age is only checked when a record is inserted, so with
+        # slow arrivals a record waits for the next insert_record() or for close().
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self._buffer = []
+        self._oldest = None
+        atexit.register(self.close)
+
+        self.ensure_indexes()
+
+    def ensure_indexes(self):
+        # create_indexes is a no-op for indexes that already exist
+        return self.collection.create_indexes([
+            IndexModel(
+                [("employee_id", ASCENDING), ("period_from", ASCENDING),
+                 ("period_to", ASCENDING), ("source_hash", ASCENDING)],
+                name="natural_key", unique=True,
+                # records written before upserts have no source_hash and may repeat
+                partialFilterExpression={"source_hash": {"$exists": True}}
+            ),
+            IndexModel(
+                [("employee_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="employee_history"
+            ),
+            IndexModel(
+                [("period_from", ASCENDING), ("period_to", ASCENDING),
+                 ("employee_id", ASCENDING), ("_id", ASCENDING)],
+                name="period_employee"
+            ),
+            IndexModel([("created_at", DESCENDING)], name="created_at"),
+        ])
+
+    def build_record(self, timesheet_data, payslip_data, ts_file, ps_file):
+        timesheet_data = bson_value(timesheet_data)
+        payslip_data = bson_value(payslip_data)
+        employee_id =  timesheet_data.get("IDENTIFIER") or payslip_data.get("PAYSLIP_BADGE")
+        ts_hash = file_hash(ts_file)
+        ps_hash = file_hash(ps_file)
+
+        return {
+            "employee_id" : employee_id,
+            "employee_name" : timesheet_data.get("NAME") or payslip_data.get("PAYSLIP_NAME"),
+
+            "period_from" : payslip_data.get("PAYSLIP_PERIOD_FROM"),
+            "period_to" : payslip_data.get("PAYSLIP_PERIOD_TO"),
+
+            "timesheet": timesheet_data,
+            "payslip" : payslip_data,
+
+            "source_files" :{
+                "timesheet_pdf" : ts_file,
+                "payslip_pdf" : ps_file,
+                "timesheet_sha256" : ts_hash,
+                "payslip_sha256" : ps_hash
+            },
+            "source_hash" : hashlib.sha256(f"{ts_hash}:{ps_hash}".encode()).hexdigest()
+            }
+
+    def insert_record(self, timesheet_data, payslip_data, ts_file, ps_file):
+        record = self.build_record(timesheet_data, payslip_data, ts_file, ps_file)
+
+        # Natural key: rerunning the same files updates the record instead of duplicating it
+        key = {
+            "employee_id" : record["employee_id"],
+            "period_from" : record["period_from"],
+            "period_to" : record["period_to"],
+            "source_hash" : record["source_hash"]
+        }
+        now = datetime.now()
+        self._buffer.append(UpdateOne(
+            key,
+            {"$set": {**record, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+            upsert=True
+        ))
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._oldest >= self.max_age:
+            return self.flush()
+        return None
+
+    def flush(self):
+        if not self._buffer:
+            return None
+        ops = self._buffer
+        try:
+            result = self.collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # unordered: every other upsert of the batch has been applied
+            for error in e.details.get("writeErrors", []):
+                print(f"MongoDB skipped record {error['op'].get('q')}: {error.get('errmsg')}")
+            result = None
+        except InvalidDocument:
+            # a record BSON cannot encode stops the batch client-side; the
+            # upserts are idempotent, so resend them one by one and skip the bad ones
+            result = None
+            for op in ops:
+                try:
+                    self.collection.bulk_write([op], ordered=False)
+                except (BulkWriteError, InvalidDocument) as e:
+                    print(f"MongoDB skipped record {op._filter}: {e}")
+        # other errors (e.g. connection) keep the buffer for the next flush
+        self._buffer, self._oldest = [], None
+        return result
+
+    def close(self):
+        self.flush()
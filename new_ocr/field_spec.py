@@ -0,0 +1,96 @@
+import re
+from collections import namedtuple
+
+# key:         output key in the result dict
+# label:       regex searched (case-insensitive) in the label cell
+# direction:   "right" (same row) or "below" (same column) of the label cell
+# stop_tokens: if a scanned cell contains one of these the field is None
+# type:        optional callable applied to the value (raw value kept if it fails)
+# skip_empty:  False -> take the adjacent cell as-is;
+#              True  -> skip empty/"none" cells and return the stripped text
+FieldSpec = namedtuple(
+    "FieldSpec",
+    ["key", "label", "direction", "stop_tokens", "type", "skip_empty"],
+    defaults=("right", (), None, False),
+)
+
+def keyword(text):
+    """Label pattern for a literal keyword (plain substring match)."""
+    return re.escape(text.strip())
+
+
+class FieldExtractor:
+    """
+    Resolve a list of FieldSpec in one sweep over a table.
+
+    All labels are compiled into one combined pattern used as a prefilter, so
+    most cells cost a single regex call; only cells that hit it are tested
+    against the fields that are still unresolved. With keep="first" every
+    field takes its first label match in row-major order and the sweep stops
+    once all fields are resolved. With keep="last" later matches overwrite
+    earlier ones.
+    """
+
+    def __init__(self, specs, keep="first"):
+        self.specs = list(specs)
+        self.keep = keep
+        self.patterns = [re.compile(spec.label, flags=re.I) for spec in self.specs]
+        self.any_label = re.compile("|".join(f"(?:{spec.label})" for spec in self.specs), flags=re.I)
+        self.stop_tokens = [tuple(t.lower() for t in spec.stop_tokens) for spec in self.specs]
+
+    def extract(self, table, label_columns=None, fill_missing=True):
+        """
+        `table` is a DataFrame or a list of rows; returns {key: value}.
+        With fill_missing=False, keys whose label never matched are left out.
+        """
+        rows = table.values.tolist() if hasattr(table, "values") and hasattr(table, "shape") else table
+        result = {spec.key: None for spec in self.specs} if fill_missing else {}
+        pending = list(range(len(self.specs)))
+
+        for r, row in enumerate(rows):
+            columns = range(len(row)) if label_columns is None else label_columns
+            for c in columns:
+                if c >= len(row):
+                    continue
+                cell = row[c]
+                if not isinstance(cell, str) or not self.any_label.search(cell):
+                    continue
+
+                for i in list(pending):
+                    if not self.patterns[i].search(cell):
+                        continue
+                    result[self.specs[i].key] = self._resolve(rows, r, c, i)
+                    if self.keep == "first":
+                        pending.remove(i)
+
+                if not pending:
+                    return result
+
+        return result
+
+    def _resolve(self, rows, r, c, i):
+        spec = self.specs[i]
+        if spec.direction == "below":
+            candidates = [row[c] if c < len(row) else None for row in rows[r + 1:]]
+        else:
+            candidates = rows[r][c + 1:]
+
+        if not spec.skip_empty:
+            return self._convert(spec, candidates[0]) if candidates else None
+
+        for cell in candidates:
+            text = str(cell).strip()
+            lower = text.lower()
+            if any(st in lower for st in self.stop_tokens[i]):
+                return None
+            if text != "" and lower != "none":
+                return self._convert(spec, text)
+        return None
+
+    def _convert(self, spec, value):
+        if spec.type is None or value is None:
+            return value
+        try:
+            return spec.type(value)
+        except (TypeError, ValueError):
+            return value
@@ -0,0 +1,61 @@
+import os
+import re
+
+# "Timesheets_<NAME> <ID> Timesheets..." / "Payslip_<NAME> <ID> PAYSLIP..."
+FILENAME_PATTERN = re.compile(
+    r"(?:Timesheets_|Payslip_)(.*?)\s+([A-Za-z0-9]+)\s+(?:Timesheets|PAYSLIP)",
+    flags=re.IGNORECASE
+)
+
+def extract_name_identifier(path: str):
+    match = FILENAME_PATTERN.search(os.path.basename(path))
+    if not match:
+        return None, None
+    return match.group(1).strip(), match.group(2).strip()
+
+def build_identifier_index(folder: str):
+    """
+    Scan `folder` once and map identifier -> list of PDF paths.
+    Files whose name does not carry an identifier are returned separately.
+    """
+    index = {}
+    unparsed = []
+
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(".pdf"):
+                continue
+            _, identifier = extract_name_identifier(entry.name)
+            if not identifier:
+                unparsed.append(entry.path)
+                continue
+            index.setdefault(identifier, []).append(entry.path)
+
+    for paths in index.values():
+        paths.sort()
+    return index, unparsed
+
+def pair_documents(timesheet_paths, payslip_folder: str):
+    """
+    Pair every timesheet with its payslip through one identifier index.
+    Returns (pairs, unmatched, ambiguous) where ambiguous maps a timesheet to
+    all payslips sharing its identifier. Ambiguous timesheets are still
+    paired, with the first of the sorted candidates.
+    """
+    index, _ = build_identifier_index(payslip_folder)
+
+    pairs = []
+    unmatched = []
+    ambiguous = {}
+    for path in timesheet_paths:
+        name, identifier = extract_name_identifier(path)
+        candidates = index.get(identifier, []) if name and identifier else []
+
+        if not candidates:
+            unmatched.append(path)
+            continue
+        if len(candidates) > 1:
+            ambiguous[path] = candidates
+        pairs.append((path, candidates[0]))
+
+    return pairs, unmatched, ambiguous
@@ -0,0 +1,89 @@
+import os
+import json
+import hashlib
+from pdfplumber.table import Table, TableSettings
+
+RULING_OBJECTS = ("lines", "rects", "curves")
+
+def layout_fingerprint(page, precision=1):
+    """
+    SHA-256 of the page's ruling geometry (lines, rects, curves), with
+    coordinates rounded to `precision` decimals. With the default "lines"
+    table strategy pdfplumber builds tables from these objects only, so an
+    equal fingerprint means equal table cells.
+    """
+    digest = hashlib.sha256()
+    for kind in RULING_OBJECTS:
+        boxes = sorted(
+            (round(o["x0"], precision), round(o["top"], precision),
+             round(o["x1"], precision), round(o["bottom"], precision))
+            for o in getattr(page, kind)
+        )
+        digest.update(kind.encode())
+        digest.update(repr(boxes).encode())
+    return digest.hexdigest()
+
+
+class LayoutCache:
+    """
+    Table regions of known page layouts, keyed by layout_fingerprint().
+
+    A template is the bounding box and explicit cell grid of every table found
+    by a full pdfplumber detection. Pages with a known fingerprint are read by
+    cropping to each stored bbox and extracting text from the stored cells,
+    which skips edge merging and intersection/cell detection. `anchors` (one
+    string per table, matched case-insensitively against the table's cells)
+    guard against reusing a template for a different document; on a mismatch
+    the page falls back to full detection. Templates can be persisted to
+    `cache_path` as JSON.
+    """
+
+    def __init__(self, anchors=(), table_settings=None, cache_path=None, precision=1):
+        self.anchors = [a.lower() for a in anchors]
+        self.table_settings = TableSettings.resolve(table_settings)
+        self.text_settings = self.table_settings.text_settings or {}
+        self.cache_path = cache_path
+        self.precision = precision
+        self.templates = {}
+        self.hits = 0
+        self.misses = 0
+
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.templates = json.load(f)
+
+    def extract_tables(self, page):
+        """Same output as page.extract_tables(table_settings)."""
+        key = layout_fingerprint(page, self.precision)
+
+        template = self.templates.get(key)
+        if template is not None:
+            tables = [
+                Table(page.crop(tuple(table["bbox"])), [tuple(c) for c in table["cells"]])
+                .extract(**self.text_settings)
+                for table in template
+            ]
+            if self._anchors_match(tables):
+                self.hits += 1
+                return tables
+
+        self.misses += 1
+        found = page.find_tables(self.table_settings)
+        tables = [t.extract(**self.text_settings) for t in found]
+        if self._anchors_match(tables):
+            self.templates[key] = [{"bbox": list(t.bbox), "cells": [list(c) for c in t.cells]} for t in found]
+        return tables
+
+    def _anchors_match(self, tables):
+        if len(tables) < len(self.anchors):
+            return False
+        for anchor, table in zip(self.anchors, tables):
+            if not any(cell and anchor in cell.lower() for row in table for cell in row):
+                return False
+        return True
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            json.dump(self.templates, f)
@@ -1,117 +1,196 @@
 import os 
-import re
-import fitz
-import pandas as pd
-import ocr_db
-# from ocr_db import MongoDB
+import argparse
+from multiprocessing import Pool
+from db import MongoDB
+from report_writer import ReportWriter
+from identifiers import pair_documents
+from classifier import PDFClassifier
+from pages import first_page_bytes
+from textract_cache import TextractCache
 from ocr_extractor1 import OCRExtractor1
 from payslip_extractor import PaySlipExtractor
 
-def is_image(pdf_path, text_threshold=50, word_threshold=20):
-    doc = fitz.open(pdf_path)
-
-    total_text = ""
-    image_found = False
-
-    for page in doc:
-        text = page.get_text().strip()
-        if text:
-            total_text += " " + text
+classifier = PDFClassifier()
 
-        if page.get_images():
-            image_found = True
-
-    text_len = len(total_text.strip())
-    word_count = len(total_text.strip().split())
-    return image_found and (text_len < text_threshold or word_count < word_threshold)
+def is_image(pdf_path, text_threshold=50, word_threshold=20):
+    return classifier.is_image(pdf_path, text_threshold, word_threshold)
 
-def extract_first_page(input_pdf, output_pdf):
-    doc = fitz.open(input_pdf)
-    new_doc = fitz.open()
+def extract_first_page(input_pdf, output_pdf=None):
+    # Without output_pdf the page is returned as in-memory PDF bytes
+    content = first_page_bytes(input_pdf)
+    if output_pdf is None:
+        return content
 
-    new_doc.insert_pdf(doc, from_page=0, to_page=0)
-    new_doc.save(output_pdf)
-    new_doc.close()
-    doc.close()
+    with open(output_pdf, "wb") as f:
+        f.write(content)
     return output_pdf
 
-def list_image_pdfs(folder_path):
+def list_image_pdfs(folder_path, pdf_classifier=None):
+    pdf_classifier = pdf_classifier or classifier
     image_pdf_paths = []
 
-    for file in os.listdir(folder_path):
-        if file.lower().endswith(".pdf"):
-            pdf_path = os.path.join(folder_path, file)
-
-            if is_image(pdf_path):
-                image_pdf_paths.append(pdf_path)
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                if pdf_classifier.is_image(entry.path):
+                    image_pdf_paths.append(entry.path)
     return image_pdf_paths
 
-def find_corresponding_payslip(timesheet_file: str, payslip_folder: str):
-    def extract_name_identifier(filename: str):
-        pattern = r"(?:Timesheets_|Payslip_)(.*?)\s+([A-Za-z0-9]+)\s+(?:Timesheets|PAYSLIP)"
-        match = re.search(pattern, filename, flags=re.IGNORECASE)
-        if not match:
-            return None, None
-        return match.group(1).strip(), match.group(2).strip()
-
-    ts_filename = os.path.basename(timesheet_file)
-    name, identifier = extract_name_identifier(ts_filename)
-
-    if not name or not identifier:
+# ---------- BATCH MODE ----------
+# Each worker process keeps its own extractors (boto3 client, parsers) for its
+# whole lifetime; only the parent process writes to Excel and MongoDB.
+# With textract_concurrency the timesheets are instead sent from the parent
+# through one ConcurrentTextract, so every call shares its AIMD limit, and
+# the worker processes only parse payslips.
+_timesheet_extractor = None
+_payslip_extractor = None
+
+def _textract_cache(textract_cache_dir=None, textract_cache_mb=512):
+    if not textract_cache_dir:
         return None
-    for file in os.listdir(payslip_folder):
-        if not file.lower().endswith(".pdf"):
+    return TextractCache(textract_cache_dir, max_bytes=textract_cache_mb * 1024 * 1024)
+
+def _init_worker(textract_cache_dir=None, textract_cache_mb=512):
+    global _timesheet_extractor, _payslip_extractor
+    _timesheet_extractor = OCRExtractor1(cache=_textract_cache(textract_cache_dir, textract_cache_mb))
+    _payslip_extractor = PaySlipExtractor()
+
+def _init_payslip_worker():
+    global _payslip_extractor
+    _payslip_extractor = PaySlipExtractor()
+
+def _extract_payslip(ps_path):
+    return _payslip_extractor.extract(ps_path)
+
+def _process_pair(pair):
+    path, ps_path = pair
+    try:
+        result1 = _timesheet_extractor.extract(path)
+        result2 = _payslip_extractor.extract(ps_path)
+        return path, ps_path, result1, result2, None
+    except Exception as e:
+        return path, ps_path, None, None, str(e)
+
+def _concurrent_results(pairs, timesheet_extractor, pool=None):
+    """
+    Same tuples as _process_pair, in completion order. Timesheets go through
+    timesheet_extractor.extract_many (concurrent Textract calls); payslips
+    are parsed on `pool` when given, otherwise here as each timesheet is done.
+    """
+    payslip_of = dict(pairs)
+    pending = {}
+    if pool is not None:
+        pending = {path: pool.apply_async(_extract_payslip, (ps_path,)) for path, ps_path in pairs}
+
+    for path, result1, error in timesheet_extractor.extract_many(list(payslip_of)):
+        ps_path = payslip_of[path]
+        if error is not None:
+            yield path, ps_path, None, None, str(error)
             continue
-        ps_name, ps_id = extract_name_identifier(file)
-        if ps_id == identifier:
-            return os.path.join(payslip_folder, file)
-    return None
-
-def save_to_excel(merged_dict, excel_path="merged_output.xlsx"):
-    new_df = pd.DataFrame([merged_dict])
-
-    if os.path.exists(excel_path):
-
-        old_df = pd.read_excel(excel_path)
-        all_columns = sorted(set(old_df.columns).union(set(new_df.columns)))
-
-        old_df = old_df.reindex(columns=all_columns)
-        new_df = new_df.reindex(columns=all_columns)
-        
-        final_df = pd.concat([old_df, new_df], ignore_index=True)
-
+        try:
+            result2 = pending[path].get() if pool is not None else _extract_payslip(ps_path)
+        except Exception as e:
+            yield path, ps_path, None, None, str(e)
+            continue
+        yield path, ps_path, result1, result2, None
+
+def run_batch(timesheet_folder, payslip_folder, output_dir, workers=1, chunksize=1, checkpoint_every=None,
+              sample_pages=None, classifier_cache=None, textract_cache_dir=None, textract_cache_mb=512,
+              textract_concurrency=None):
+    pdf_classifier = PDFClassifier(max_pages=sample_pages, cache_path=classifier_cache)
+    paths = list_image_pdfs(timesheet_folder, pdf_classifier)
+    pdf_classifier.save()
+    pairs, unmatched, ambiguous = pair_documents(paths, payslip_folder)
+
+    # Report pairing problems before any OCR work is started
+    for path in unmatched:
+        print(f"No payslip found for: {path}")
+    for path, candidates in ambiguous.items():
+        print(f"Multiple payslips found for: {path} -> {candidates}, using {candidates[0]}")
+    print(f"Paired: {len(pairs)}, Unmatched: {len(unmatched)}, Ambiguous: {len(ambiguous)}")
+
+    excel_path = os.path.join(output_dir, "generated_report.xlsx")
+    report = ReportWriter(excel_path, checkpoint_every=checkpoint_every)
+    ocr_db = MongoDB()
+
+    timesheet_extractor = None
+    pool = None
+    if textract_concurrency:
+        timesheet_extractor = OCRExtractor1(cache=_textract_cache(textract_cache_dir, textract_cache_mb),
+                                            max_concurrency=textract_concurrency)
+        if workers == 1:
+            _init_payslip_worker()
+        else:
+            pool = Pool(processes=workers, initializer=_init_payslip_worker)
+        results = _concurrent_results(pairs, timesheet_extractor, pool)
+    elif workers == 1:
+        _init_worker(textract_cache_dir, textract_cache_mb)
+        results = map(_process_pair, pairs)
     else:
-        # No existing file → create with sorted columns
-        all_columns = sorted(new_df.columns)
-        final_df = new_df.reindex(columns=all_columns)
-
-    final_df.to_excel(excel_path, index=False)
-
-    return excel_path
-
-dir_path = r"output"
-timesheets = r"timesheets"
-payslips = r"payslip"
-
-paths = list_image_pdfs(timesheets)
-
-timesheet_extractor = OCRExtractor1()
-payslip_extractor = PaySlipExtractor()
-
-try:
-    for path in paths:
-        ps_path = find_corresponding_payslip(path, payslips)
-
-        result1= timesheet_extractor.extract(path)
-        result2 = payslip_extractor.extract(ps_path)
-
-        combined = {**result1, **result2}
-        # Save to Excel (exiting)
-        save_to_excel(combined, f"{dir_path}/generated_report.xlsx")
-
-        # Save to MongoDB (new)
-        ocr_db.insert_record(result1, result2, path, ps_path)
-        print(f"Data stored in MongoDB for: {path}")
-
-except Exception as e:
-    print("Error while execution: ", e)
+        pool = Pool(processes=workers, initializer=_init_worker,
+                    initargs=(textract_cache_dir, textract_cache_mb))
+        results = pool.imap_unordered(_process_pair, pairs, chunksize)
+
+    processed = 0
+    failed = 0
+    try:
+        for path, ps_path, result1, result2, error in results:
+            if error:
+                failed += 1
+                print(f"Error while processing {path}: {error}")
+                continue
+
+            combined = {**result1, **result2}
+            # Save to Excel (written once at the end, or at each checkpoint)
+            report.add(combined)
+
+            # Save to MongoDB (new)
+            ocr_db.insert_record(result1, result2, path, ps_path)
+            processed += 1
+            print(f"Data stored in MongoDB for: {path}")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if timesheet_extractor is not None:
+            timesheet_extractor.textract.close()
+        report.close()
+        ocr_db.close()
+
+    return processed, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract timesheet/payslip pairs into Excel and MongoDB.")
+    parser.add_argument("--timesheets", default=r"timesheets")
+    parser.add_argument("--payslips", default=r"payslip")
+    parser.add_argument("--output", default=r"output")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--checkpoint-every", type=int, default=None,
+                        help="rewrite the Excel report every N records")
+    parser.add_argument("--sample-pages", type=int, default=None,
+                        help="classify scanned vs text PDFs from the first N pages only")
+    parser.add_argument("--classifier-cache", default=None,
+                        help="JSON file that keeps scanned/text verdicts between runs")
+    parser.add_argument("--textract-cache", default=None,
+                        help="directory for cached Textract responses")
+    parser.add_argument("--textract-cache-mb", type=int, default=512)
+    parser.add_argument("--textract-concurrency", type=int, default=None,
+                        help="send the timesheet Textract calls from the main process through one "
+                             "rate-limited, retrying client with up to N calls in flight "
+                             "(--workers processes then only parse payslips)")
+    args = parser.parse_args()
+
+    try:
+        processed, failed = run_batch(args.timesheets, args.payslips, args.output,
+                                      workers=args.workers, chunksize=args.chunksize,
+                                      checkpoint_every=args.checkpoint_every,
+                                      sample_pages=args.sample_pages,
+                                      classifier_cache=args.classifier_cache,
+                                      textract_cache_dir=args.textract_cache,
+                                      textract_cache_mb=args.textract_cache_mb,
+                                      textract_concurrency=args.textract_concurrency)
+        print(f"Processed: {processed}, Failed: {failed}")
+    except Exception as e:
+        print("Error while execution: ", e)
@@ -1,54 +1,119 @@
-import pandas as pd
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openpyxl import load_workbook
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 
-try:
-    # 1. Load Excel
-    file_path = "C:\\Users\\Developer\\Shubham_files\\ocr\\output.xlsx"
-    df= pd.read_excel(file_path)
-    print(df.to_string())
-    #Additional FIX
-    df.columns = df.columns.map(str)
+IDENTIFY_COLS = ["EMPLOYEE_NAME", "PASSPORT_NUMBER"]
 
-    # 2. Identify column groups
-    payslips_cols = [c for c in df.columns if c.startswith("PAYSLIP_")]
-    timesheet_cols = [c for c in df.columns if c.startswith("TIMESHEET_")]
+def iter_row_chunks(file_path, chunk_size=5000, sheet_name=None):
+    """
+    Stream the sheet with a read-only workbook and yield (header, rows) chunks.
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.active
+        rows = ws.iter_rows(values_only=True)
 
-    identify_cols = ["EMPLOYEE_NAME", "PASSPORT_NUMBER"]
-    identify_cols = [c for c in identify_cols if c in df.columns]
+        header = next(rows, None)
+        if header is None:
+            return
+        # Column names may be numbers in Excel; MongoDB keys must be strings
+        header = [str(c) for c in header]
 
-    # 3. Slip into the names for MongoDB
-    df_payslip = df[identify_cols + payslips_cols].copy()
-    df_timesheet = df[identify_cols + timesheet_cols].copy()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+    finally:
+        wb.close()
 
-    # 4. Clean column names for MongoDB
-    df_payslip.columns = [c.lower() for c in df_payslip.columns]
-    df_timesheet.columns = [c.lower() for c in df_timesheet.columns]
+def column_groups(header, identify_cols=IDENTIFY_COLS):
+    """
+    (index, mongo field) pairs for the payslip and timesheet documents.
+    """
+    identify = [(i, c.lower()) for i, c in enumerate(header) if c in identify_cols]
+    payslip = [(i, c.lower()) for i, c in enumerate(header) if c.startswith("PAYSLIP_")]
+    timesheet = [(i, c.lower()) for i, c in enumerate(header) if c.startswith("TIMESHEET_")]
+    return identify + payslip, identify + timesheet
 
-    df_payslip = df_payslip.where(pd.notnull(df_payslip), None)
-    df_timesheet = df_timesheet.where(pd.notnull(df_timesheet), None)
+def split_rows(rows, columns):
+    # Empty cells already come back as None from openpyxl
+    return [{field: (row[i] if i < len(row) else None) for i, field in columns} for row in rows]
 
-    # 5. MongoDB Nan -> None for MongoDB
-    client = MongoClient("mongodb://localhost:27017")
-    db = client["OCR_Database"]
 
-    payslip_collection = db["Payslip_Data"]
-    timesheet_collection = db["Timesheet_Data"]
+class ExcelToMongoLoader:
+    """
+    Load the consolidated workbook into the Payslip_Data / Timesheet_Data
+    collections chunk by chunk. Inserting one chunk overlaps with reading the
+    next, and at most one chunk per collection is in flight, so memory stays
+    bounded by `chunk_size`.
+    """
 
-    # 6 . Insert into MongoDB:
-    payslip_data = df_payslip.to_dict(orient="records")
-    timesheet_data = df_timesheet.to_dict(orient="records")
+    def __init__(self, uri="mongodb://localhost:27017", db_name="OCR_Database", chunk_size=5000,
+                 payslip_collection="Payslip_Data", timesheet_collection="Timesheet_Data", client=None):
+        self.client = client or MongoClient(uri)
+        self.db = self.client[db_name]
+        self.payslip_collection = self.db[payslip_collection]
+        self.timesheet_collection = self.db[timesheet_collection]
+        self.chunk_size = chunk_size
 
-except Exception as e:
-    print("Error at getting the sheet data. ", e)
+    def _insert(self, collection, docs):
+        if not docs:
+            return 0
+        try:
+            return len(collection.insert_many(docs, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            print(f"Bulk write errors in {collection.name}: {len(e.details.get('writeErrors', []))}")
+            return e.details.get("nInserted", 0)
 
-try:
-    if payslip_data:
-        payslip_collection.insert_many(payslip_data)
-        print("Data inserted into Payslip_Data.")
+    def load(self, file_path, sheet_name=None):
+        start = time.perf_counter()
+        total_rows = 0
+        inserted = {"payslip": 0, "timesheet": 0}
+        pending = []
+        columns = None
 
-    if timesheet_data:
-        timesheet_collection.insert_many(timesheet_data)
-        print("Data inserted into Timesheet_Data.")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for header, rows in iter_row_chunks(file_path, self.chunk_size, sheet_name):
+                if columns is None:
+                    columns = column_groups(header)
+                payslip_cols, timesheet_cols = columns
 
-except Exception as e:
-    print("Error at: ", e)
+                payslip_docs = split_rows(rows, payslip_cols)
+                timesheet_docs = split_rows(rows, timesheet_cols)
+
+                # Wait for the previous chunk before queueing this one
+                for name, future in pending:
+                    inserted[name] += future.result()
+                pending = [
+                    ("payslip", executor.submit(self._insert, self.payslip_collection, payslip_docs)),
+                    ("timesheet", executor.submit(self._insert, self.timesheet_collection, timesheet_docs)),
+                ]
+
+                total_rows += len(rows)
+                elapsed = time.perf_counter() - start
+                print(f"Rows read: {total_rows} ({total_rows / elapsed:.0f} rows/sec)")
+
+            for name, future in pending:
+                inserted[name] += future.result()
+
+        elapsed = time.perf_counter() - start
+        rate = total_rows / elapsed if elapsed else 0.0
+        print(f"Inserted {inserted['payslip']} into {self.payslip_collection.name}, "
+              f"{inserted['timesheet']} into {self.timesheet_collection.name} "
+              f"in {elapsed:.1f}s ({rate:.0f} rows/sec)")
+
+        return {"rows": total_rows, "seconds": elapsed, "rows_per_sec": rate, **inserted}
+
+
+if __name__ == "__main__":
+    try:
+        file_path = "C:\\Users\\Developer\\Shubham_files\\ocr\\output.xlsx"
+        ExcelToMongoLoader().load(file_path)
+    except Exception as e:
+        print("Error at: ", e)
@@ -1,14 +1,25 @@
 import boto3
-import os
-import re
-import tempfile
 
 from ocr_parser1 import OCRParser
-from PyPDF2 import PdfReader, PdfWriter
+from identifiers import extract_name_identifier
+from pages import first_page_bytes
+from textract_client import ConcurrentTextract
+from textract_tables import parse_table_grids
+
+FEATURE_TYPES = ["TABLES"]
 
 class OCRExtractor1:
-    def __init__(self, region="ap-south-1"):
-        self.textract = boto3.client("textract", region_name=region)
+    def __init__(self, region="ap-south-1", cache=None, max_concurrency=None, client=None):
+        # With max_concurrency the client is wrapped in ConcurrentTextract:
+        # AIMD rate limiting, jittered retries on throttling and a sized connection pool.
+        if max_concurrency:
+            self.textract = ConcurrentTextract(client, region=region, max_workers=max_concurrency)
+        else:
+            self.textract = client or boto3.client("textract", region_name=region)
+        # Optional TextractCache; reruns on the same pages skip analyze_document
+        self.cache = cache
+        # Stateless, so one parser serves every file (and every extract_many thread)
+        self.parser = OCRParser()
 
     def extract(self, file_path):
         first_page_pdf = self._get_first_page_pdf(file_path)
@@ -16,77 +27,47 @@ class OCRExtractor1:
         tables = self.extract_tables(first_page_pdf)
         name, identifier = self.extract_name_identifier(file_path)
 
-        extractor = OCRParser(name, identifier)
-        result = extractor.extract(tables)
-        os.remove(first_page_pdf)
-
-        return result
-
-    def _get_first_page_pdf(self, file_path):
-        """Create a temporary PDF that contains only page 1."""
-        reader = PdfReader(file_path)
-        writer = PdfWriter()
+        return self.parser.extract(tables, name, identifier)
 
-        writer.add_page(reader.pages[0])
-        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        with open(tmp_file.name, "wb") as f:
-            writer.write(f)
+    def extract_many(self, file_paths):
+        """
+        Extract several timesheets, submitting them concurrently when the
+        client is a ConcurrentTextract. Yields (file_path, result, error).
+        """
+        if isinstance(self.textract, ConcurrentTextract):
+            yield from self.textract.map(self.extract, file_paths)
+            return
 
-        return tmp_file.name
+        for file_path in file_paths:
+            try:
+                yield file_path, self.extract(file_path), None
+            except Exception as e:
+                yield file_path, None, e
 
-    def extract_tables(self, file_path):
-        with open(file_path, "rb") as f:
-            content = f.read()
+    def _get_first_page_pdf(self, file_path):
+        """Return an in-memory PDF (bytes) that contains only page 1."""
+        return first_page_bytes(file_path)
+
+    def extract_tables(self, pdf):
+        if isinstance(pdf, (bytes, bytearray)):
+            content = bytes(pdf)
+        else:
+            with open(pdf, "rb") as f:
+                content = f.read()
+
+        response = self.cache.get(content, FEATURE_TYPES) if self.cache else None
+        if response is None:
+            response = self.textract.analyze_document(
+                Document={"Bytes": content},
+                FeatureTypes=FEATURE_TYPES
+            )
+            if self.cache:
+                self.cache.put(content, FEATURE_TYPES, response)
 
-        response = self.textract.analyze_document(
-            Document={"Bytes": content},
-            FeatureTypes=["TABLES"]
-        )
         return self._parse_tables(response)
 
     def extract_name_identifier(self, path: str):
-        filename = os.path.basename(path)
-        pattern = r"Timesheets_(.*?)\s+([A-Za-z0-9]+)\s+Timesheets"
-
-        match = re.search(pattern, filename)
-        if not match:
-            return None, None
-
-        return match.group(1).strip(), match.group(2).strip()
+        return extract_name_identifier(path)
 
     def _parse_tables(self, response):
-        blocks = response["Blocks"]
-        block_map = {b["Id"]: b for b in blocks}
-        tables = []
-        table_blocks = [b for b in blocks if b["BlockType"] == "TABLE"]
-
-        for table in table_blocks:
-            rows = {}
-            for rel in table.get("Relationships", []):
-                if rel["Type"] != "CHILD":
-                    continue
-
-                for cell_id in rel["Ids"]:
-                    cell = block_map[cell_id]
-                    if cell["BlockType"] != "CELL":
-                        continue
-
-                    row = cell["RowIndex"]
-                    col = cell["ColumnIndex"]
-
-                    text = ""
-                    if "Relationships" in cell:
-                        for rrel in cell["Relationships"]:
-                            if rrel["Type"] == "CHILD":
-                                for wid in rrel["Ids"]:
-                                    word_block = block_map[wid]
-                                    if word_block["BlockType"] == "WORD":
-                                        text += word_block.get("Text", "") + " "
-
-                    rows.setdefault(row, {})
-                    rows[row][col] = text.strip()
-
-            sorted_rows = [rows[i] for i in sorted(rows.keys())]
-            tables.append(sorted_rows)
-
-        return tables
+        return [grid.to_rows() for grid in parse_table_grids(response)]
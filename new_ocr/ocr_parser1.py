@@ -1,67 +1,220 @@
+import numpy as np
+from collections import namedtuple
 import pandas as pd
 from pathlib import Path
 import re
+from field_spec import FieldSpec, FieldExtractor, keyword
+
+EMPTY_TOKENS = {"", "-", "–", "—"}
+# parse_hours treated these as "no entry"
+EMPTY_HOURS = EMPTY_TOKENS | {"None", "nan"}
+DAY_COLUMN = re.compile(r"\d{2}")
+
+# -------------------------------------------
+# TABLE LABELS (built once per process)
+# -------------------------------------------
+EMPLOYEE_LABELS = (
+    ("badge", "TIMESHEET_BADGE_NUMBER"),
+    ("position", "TIMESHEET_POSITION"),
+    ("department", "TIMESHEET_DEPARTMENT"),
+)
+COMPANY_LABELS = (
+    ("weekly working hours", "TIMESHEET_WEEKLY_WORKING_HOURS"),
+    ("hiring company", "TIMESHEET_HIRING_COMPANY"),
+    ("cost center", "TIMESHEET_COST_CENTER"),
+    ("work location", "TIMESHEET_WORK_LOCATION"),
+)
+
+# Summary rows below the job table: label in column 0, value in column 1
+SUMMARY_FIELDS = FieldExtractor([
+    FieldSpec("TIMESHEET_PRESENCE_DAYS(P)", keyword("presence")),
+    FieldSpec("TIMESHEET_SICK_LEAVE(S)", keyword("sick")),
+    FieldSpec("TIMESHEET_VACATION(V)", keyword("vacation")),
+    FieldSpec("TIMESHEET_MISSION_DAYS(M)", keyword("mission days")),
+    FieldSpec("TIMESHEET_MISSION_IN_EUROPE(ME)", keyword("europe")),
+    FieldSpec("TIMESHEET_MISSION_OFFSHORE(MO)", keyword("offshore")),
+    FieldSpec("TIMESHEET_UNPAID_DAYS(U)", keyword("unpaid")),
+    FieldSpec("TIMESHEET_TRAVEL_DAYS(T)", keyword("travel")),
+    FieldSpec("TIMESHEET_TOTAL_WORKING_HOURS", keyword("working")),
+    FieldSpec("TIMESHEET_TOTAL_NORMAL_HOURS", keyword("normal")),
+    FieldSpec("TIMESHEET_TOTAL_OVERTIME_WEEKDAYS", keyword("weekdays")),
+    FieldSpec("TIMESHEET_TOTAL_OVERTIME_WEEKEND", keyword("weekend")),
+], keep="last")
+
+TableScan = namedtuple("TableScan", ["type", "labels"])
+
+# Every keyword the classifier and the label lookup need, in one
+# alternation compiled once per process
+TABLE_KEYWORDS = ("badge", "employee", "weekly working hours", "hiring company",
+                  "job no", "descr", "time reporting", "wbs")
+EMPLOYEE_KEYS = dict(EMPLOYEE_LABELS)
+COMPANY_KEYS = dict(COMPANY_LABELS)
+LABEL_WORDS = set(EMPLOYEE_KEYS) | set(COMPANY_KEYS)
+TABLE_TOKENS = re.compile("|".join(
+    re.escape(word) for word in dict.fromkeys(TABLE_KEYWORDS + tuple(EMPLOYEE_KEYS) + tuple(COMPANY_KEYS))
+))
+EMPLOYEE_LABEL = re.compile("|".join(re.escape(prefix) for prefix in EMPLOYEE_KEYS))
+COMPANY_LABEL = re.compile("|".join(re.escape(label) for label in COMPANY_KEYS))
+
+def _table_text(table):
+    """Lowercased cell text, cells joined by spaces and rows by newlines."""
+    try:
+        # Textract cells are strings; str() only when one is not
+        text = "\n".join([" ".join(row.values()) for row in table])
+    except TypeError:
+        text = "\n".join([" ".join([str(v) for v in row.values()]) for row in table])
+    return text.lower()
+
+def _scan(table):
+    """
+    One matcher pass over the table text: the keywords found anywhere,
+    those of the header row (row 1), and the employee / company label
+    values. Only rows whose text holds a label word have their label cell
+    (column 1, value in column 2) looked at; employee labels match as
+    prefixes, company labels anywhere in the cell.
+    """
+    text = _table_text(table)
+    header_start = text.find("\n") + 1 or len(text) + 1
+    header_end = text.find("\n", header_start)
+    if header_end < 0:
+        header_end = len(text)
+
+    found = set()
+    header = set()
+    label_rows = []
+    row_index = 0
+    counted_to = 0
+    for match in TABLE_TOKENS.finditer(text):
+        word = match.group()
+        start = match.start()
+        found.add(word)
+        if header_start <= start < header_end:
+            header.add(word)
+        if word in LABEL_WORDS:
+            row_index += text.count("\n", counted_to, start)
+            counted_to = start
+            if not label_rows or label_rows[-1] != row_index:
+                label_rows.append(row_index)
+
+    employee = {}
+    company = {}
+    for row_index in label_rows:
+        row = table[row_index]
+        if 1 in row and 2 in row:
+            key = str(row[1]).strip(" :").lower()
+            label = EMPLOYEE_LABEL.match(key)
+            if label:
+                employee[EMPLOYEE_KEYS[label.group()]] = row[2]
+            for label in COMPANY_LABEL.findall(key):
+                company[COMPANY_KEYS[label]] = row[2]
+    return found, header, employee, company
+
+def _classify(found, header):
+    # Table 0 usually contains personal info
+    if "badge" in found and "employee" in found:
+        return "employee"
+    # Table 1: company info
+    if "weekly working hours" in found or "hiring company" in found:
+        return "company"
+    # Actual Timesheet Table
+    if "job no" in header and "descr" in header or "time reporting" in header or "wbs" in header:
+        return "timesheet"
+    return "unknown"
+
+def scan_timesheet_table(table):
+    """
+    Classify a Textract table and pick up its label -> value pairs with a
+    single pass of the compiled matcher (see _scan).
+    """
+    found, header, employee, company = _scan(table)
+    type_ = _classify(found, header)
+    if type_ == "employee":
+        return TableScan(type_, employee)
+    if type_ == "company":
+        return TableScan(type_, company)
+    return TableScan(type_, {})
+
+def _day_hours_long(timesheet_df):
+    """
+    Melt one job x day grid into long form: one row per (day, job) cell,
+    ordered day by day and job by job, as the old nested loops produced them.
+    """
+    day_cols = [(pos, col) for pos, col in enumerate(timesheet_df.columns) if DAY_COLUMN.fullmatch(str(col))]
+    day_cols = sorted(day_cols, key=lambda x: int(x[1]))
+
+    n_rows = len(timesheet_df)
+    n_days = len(day_cols)
+    values = timesheet_df.iloc[:, [pos for pos, _ in day_cols]].astype(str).to_numpy()
+
+    long_df = pd.DataFrame({
+        "DAY": np.repeat(np.arange(1, n_days + 1), n_rows),
+        "JOB_NO": np.tile(timesheet_df.iloc[:, 0].astype(str).str.strip().to_numpy(), n_days),
+        "JOB_DESC": np.tile(timesheet_df.iloc[:, 1].astype(str).str.strip().to_numpy(), n_days),
+        "VALUE": values.T.ravel().astype(str),
+    })
+    return long_df, n_days
+
+def extract_day_hours_batch(timesheet_dfs):
+    """
+    Day-wise hours for many timesheet grids in one pass.
+
+    Each grid is melted to long form, all grids are concatenated, and the
+    hour values are normalised with a single bulk numeric conversion
+    (numbers become floats, other non-empty text is kept as-is). Returns one
+    {"TIMESHEET_DAY_n": [{"JOB_NO", "JOB_DESC", "HOURS"}, ...]} dict per grid.
+    """
+    parts = []
+    results = []
+    for grid_idx, timesheet_df in enumerate(timesheet_dfs):
+        long_df, n_days = _day_hours_long(timesheet_df)
+        long_df["GRID"] = grid_idx
+        parts.append(long_df)
+        results.append({f"TIMESHEET_DAY_{i}": [] for i in range(1, n_days + 1)})
+
+    if not parts:
+        return results
+
+    long_df = pd.concat(parts, ignore_index=True)
+    values = long_df["VALUE"].str.strip()
+    long_df = long_df[~values.isin(EMPTY_HOURS)]
+    values = values[long_df.index]
+
+    numeric = pd.to_numeric(values, errors="coerce").astype(float)
+    long_df = long_df.assign(HOURS=numeric.astype(object).where(numeric.notna(), values))
+
+    for (grid_idx, day), group in long_df.groupby(["GRID", "DAY"], sort=False):
+        results[grid_idx][f"TIMESHEET_DAY_{day}"] = group[["JOB_NO", "JOB_DESC", "HOURS"]].to_dict("records")
+
+    return results
 
 class OCRParser:
-    def __init__(self, name, identifier):
+    """Parser for Textract timesheet tables; extract() returns a new dict per call."""
+
+    def __init__(self, name=None, identifier=None):
         self.identifier = identifier
         self.name = name
+
     # -------------------------------------------
     # CLASSIFY TABLE
     # -------------------------------------------
-    def classify_timesheet_table(self, table):
-        text = " ".join(str(v).lower() for row in table for v in row.values())
-
-        # Table 0 usually contains personal info
-        if "badge" in text and "employee" in text:
-            return "employee"
-
-        # Table 1: company info
-        if "weekly working hours" in text or "hiring company" in text:
-            return "company"
-
-        # Actual Timesheet Table
-        header_text = " ".join(str(v).lower() for v in table[1].values())
-        if "job no" in header_text and "descr" in header_text or "time reporting" in header_text or "wbs" in header_text:
-            return "timesheet"
-
-        return "unknown"
+    def classify_timesheet_table(self, table, scan=None):
+        return (scan or scan_timesheet_table(table)).type
 
     # -------------------------------------------
     # EMPLOYEE TABLE EXTRACTION
     # -------------------------------------------
-    def extract_employee(self, table):
-        out = {}
-        for row in table:
-            if 1 in row and 2 in row:
-                key = str(row[1]).strip(" :").lower()
-                val = row[2]
-                if key.startswith("badge"):
-                    out["TIMESHEET_BADGE_NUMBER"] = val
-                if key.startswith("position"):
-                    out["TIMESHEET_POSITION"] = val
-                if key.startswith("department"):
-                    out["TIMESHEET_DEPARTMENT"] = val
-        return out
+    def extract_employee(self, table, scan=None):
+        if scan is None or scan.type != "employee":
+            return _scan(table)[2]
+        return dict(scan.labels)
 
     # -------------------------------------------
     # COMPANY TABLE EXTRACTION
     # -------------------------------------------
-    def extract_company(self, table):
-        out = {}
-        for row in table:
-            if 1 in row and 2 in row:
-                key = row[1].strip(" :").lower()
-                val = row[2]
-                if "weekly working hours" in key:
-                    out["TIMESHEET_WEEKLY_WORKING_HOURS"] = val
-                if "hiring company" in key:
-                    out["TIMESHEET_HIRING_COMPANY"] = val
-                if "cost center" in key:
-                    out["TIMESHEET_COST_CENTER"] = val
-                if "work location" in key:
-                    out["TIMESHEET_WORK_LOCATION"] = val
-        return out
+    def extract_company(self, table, scan=None):
+        if scan is None or scan.type != "company":
+            return _scan(table)[3]
+        return dict(scan.labels)
 
     # -------------------------------------------
     # MAIN TIMESHEET EXTRACTION
@@ -83,107 +236,50 @@ class OCRParser:
         df = pd.DataFrame(cleaned_rows)
 
         # 2. DETECT HEADER + END
-        def is_header_row(row):
-            header_regex = r"(?:JOB|DESCR|JOB\s*NO|TIME\s*REPORTING|REPORTING\s*CODE)"
-            return row.astype(str).str.upper().str.strip().str.contains(header_regex, na=False).any()
-
-        def is_end_row(row):
-            end_regex = r"(?:PRESENCE|PRESENC)"
-            return row.astype(str).str.upper().str.strip().str.contains(end_regex, na=False).any()
+        cells = df.astype(str).apply(lambda col: col.str.upper().str.strip())
+        header_regex = r"(?:JOB|DESCR|JOB\s*NO|TIME\s*REPORTING|REPORTING\s*CODE)"
+        end_regex = r"(?:PRESENCE|PRESENC)"
 
-        header_idx = df.apply(is_header_row, axis=1).idxmax()
-        end_idx = df.apply(is_end_row, axis=1).idxmax()
+        header_idx = cells.apply(lambda col: col.str.contains(header_regex, na=False)).any(axis=1).idxmax()
+        end_idx = cells.apply(lambda col: col.str.contains(end_regex, na=False)).any(axis=1).idxmax()
 
         # 3. CREATE JOB TABLE DATAFRAME
         timesheet_df = df.iloc[header_idx + 1 : end_idx].copy()
         timesheet_df.columns = df.iloc[header_idx]
 
         # remove all-dash empty rows
-        EMPTY_TOKENS = {"", "-", "–", "—"}
-        def is_empty_or_dash_row(row):
-            return all(str(v).strip() in EMPTY_TOKENS for v in row)
-
-        timesheet_df = timesheet_df[~timesheet_df.apply(is_empty_or_dash_row, axis=1)].reset_index(drop=True)
+        stripped = np.char.strip(timesheet_df.astype(str).to_numpy().astype(str))
+        empty_rows = np.isin(stripped, list(EMPTY_TOKENS)).all(axis=1)
+        timesheet_df = timesheet_df[~empty_rows].reset_index(drop=True)
 
         summary_df = df.iloc[end_idx:, :2]
 
         # ----------------------
         # Extract Day-wise Hours
         # ----------------------
-        job_no_col = timesheet_df.columns[0]
-        job_desc_col = timesheet_df.columns[1]
-
-        def parse_hours(val):
-            val = str(val).strip()
-            if val in ["", "-", "–", "—", "None", "nan"]:
-                return None
-            try:
-                return float(val)
-            except:
-                return val
-
-        day_cols = [col for col in timesheet_df.columns if re.fullmatch(r"\d{2}", str(col))]
-        day_cols = sorted(day_cols, key=lambda x: int(x))
-
-        result = {}
-
-        for i, day_col in enumerate(day_cols, start=1):
-            key = f"TIMESHEET_DAY_{i}"
-            day_entries = []
-            for _, row in timesheet_df.iterrows():
-                hrs = parse_hours(row[day_col])
-                if hrs is None:
-                    continue
-                day_entries.append({
-                    "JOB_NO": str(row[job_no_col]).strip(),
-                    "JOB_DESC": str(row[job_desc_col]).strip(),
-                    "HOURS": hrs
-                })
-            result[key] = day_entries
+        result = extract_day_hours_batch([timesheet_df])[0]
 
         # ----------------------
         # Extract Summary Metrics
         # ----------------------
-        for row in summary_df.itertuples(index=False):
-            label = str(row[0]).strip().lower()
-            value = row[1]
-
-            mapping = {
-                "presence": "TIMESHEET_PRESENCE_DAYS(P)",
-                "sick": "TIMESHEET_SICK_LEAVE(S)",
-                "vacation": "TIMESHEET_VACATION(V)",
-                "mission days": "TIMESHEET_MISSION_DAYS(M)",
-                "europe": "TIMESHEET_MISSION_IN_EUROPE(ME)",
-                "offshore": "TIMESHEET_MISSION_OFFSHORE(MO)",
-                "unpaid": "TIMESHEET_UNPAID_DAYS(U)",
-                "travel": "TIMESHEET_TRAVEL_DAYS(T)",
-                "working": "TIMESHEET_TOTAL_WORKING_HOURS",
-                "normal": "TIMESHEET_TOTAL_NORMAL_HOURS",
-                "weekdays": "TIMESHEET_TOTAL_OVERTIME_WEEKDAYS",
-                "weekend": "TIMESHEET_TOTAL_OVERTIME_WEEKEND",
-            }
-
-            for key, out_key in mapping.items():
-                if key in label:
-                    result[out_key] = value
+        result.update(SUMMARY_FIELDS.extract(summary_df, label_columns=(0,), fill_missing=False))
 
         return result
 
     # -------------------------------------------
     # PARSE ALL TIMESHEET TABLES
     # -------------------------------------------
-    def extract(self, data):
+    def extract(self, data, name=None, identifier=None):
         final = {
-            "EMPLOYEE_NAME": self.name,
-            "PASSPORT_NUMBER": self.identifier
+            "EMPLOYEE_NAME": self.name if name is None else name,
+            "PASSPORT_NUMBER": self.identifier if identifier is None else identifier
         }
 
         for table in data:
-            type_ = self.classify_timesheet_table(table)
-            if type_ == "employee":
-                final.update(self.extract_employee(table))
-            elif type_ == "company":
-                final.update(self.extract_company(table))
+            scan = scan_timesheet_table(table)
+            type_ = scan.type
+            if type_ in ("employee", "company"):
+                final.update(scan.labels)
             elif type_ == "timesheet":
                 final.update(self.extract_timesheet(table))
 
@@ -1,10 +1,16 @@
 class OCRParser:
-    def __init__(self, name, identifier):
+    """
+    Keeps no per-document state; extract() builds a fresh result on every
+    call, so one instance can be reused across files and threads. `name` and
+    `identifier` are defaults that extract() can override per document.
+    """
+
+    def __init__(self, name=None, identifier=None):
         self.identifier = identifier
         self.name = name
-        self.master = {}
 
     def extract_timesheet(self, df):
+        result = {}
 
         # -----------------------------------
         # Utility: find a row containing prefix
@@ -62,18 +68,18 @@ class OCRParser:
         if name_cell:
             parts = name_cell.replace("Name:", "").strip().split("\n")
             name = " ".join(p.strip() for p in parts)
-            self.master["TIMESHEET_EMPLOYEE_NAME"] = name
+            result["TIMESHEET_EMPLOYEE_NAME"] = name
 
         if designation_cell:
             designation = designation_cell.split(":", 1)[1].strip()
-            self.master["TIMESHEET_EMPLOYEE_DESIGNATION"] = designation
+            result["TIMESHEET_EMPLOYEE_DESIGNATION"] = designation
 
         # -----------------------------------
         # STEP 2: Find job code alignment row
         # -----------------------------------
         job_idx, job_row = find_job_code_row(df)
         if job_idx is None:
-            return
+            return result
 
         # Extract sequential days from job code row
         day_numbers = []
@@ -92,17 +98,20 @@ class OCRParser:
 
         # Save aligned values
         for day_index, value in enumerate(normal_values, start=1):
-            self.master[f"TIMESHEET_DAY_{day_index}"] = value
+            result[f"TIMESHEET_DAY_{day_index}"] = value
 
+        return result
 
     # -----------------------------------
     # Main Extract Wrapper
     # -----------------------------------
-    def extract(self, dfs):
-        self.master["EMPLOYEE_NAME"] = self.name
-        self.master["PASSPORT_NUMBER"] = self.identifier
+    def extract(self, dfs, name=None, identifier=None):
+        master = {
+            "EMPLOYEE_NAME": self.name if name is None else name,
+            "PASSPORT_NUMBER": self.identifier if identifier is None else identifier,
+        }
 
         # Timesheet → always first df
-        self.extract_timesheet(dfs[0])
+        master.update(self.extract_timesheet(dfs[0]))
 
-        return self.master
+        return master
@@ -1,8 +1,22 @@
+from field_spec import FieldSpec, FieldExtractor, keyword
+
+TIMESHEET_FIELDS = FieldExtractor([
+    FieldSpec("TIMESHEET_NAME", keyword("name"), skip_empty=True),
+    FieldSpec("TIMESHEET_DESIGNATION", keyword("designation"), skip_empty=True),
+    FieldSpec("TIMESHEET_BADGE_NUMBER", keyword("B. No."), skip_empty=True),
+    FieldSpec("TIMESHEET_PROJECT", keyword("project"), skip_empty=True),
+    FieldSpec("TIMESHEET_LOCATION", keyword("location"), skip_empty=True),
+])
+
 class SelectableParser:
-    def __init__(self, name, identifier):
+    """
+    Parser for pdfplumber timesheet tables. Safe to share between threads:
+    nothing is stored on the instance during extract().
+    """
+
+    def __init__(self, name=None, identifier=None):
         self.identifier = identifier
         self.name = name
-        self.master = {}
 
     def find_corresonding_value(self, df, keyword, stop_tokens=None):
         keyword = keyword.lower().strip()
@@ -89,21 +103,11 @@ class SelectableParser:
     def extract_timesheet(self, df):
 
         # self.extract_name_and_designation(df)
-        name = self.find_corresonding_value(df, "name")
-        designation = self.find_corresonding_value(df, "designation")
-        badge= self.find_corresonding_value(df, "B. No.")
-        project = self.find_corresonding_value(df, "project")
-        location = self.find_corresonding_value(df, "location")
-
-        self.master["TIMESHEET_NAME"] = name
-        self.master["TIMESHEET_DESIGNATION"] = designation
-        self.master["TIMESHEET_BADGE_NUMBER"] = badge
-        self.master["TIMESHEET_PROJECT"] = project
-        self.master["TIMESHEET_LOCATION"] = location
+        result = TIMESHEET_FIELDS.extract(df)
         # --- Job Code Alignment Row ---
         job_idx, job_row = self.find_job_code_row(df)
         if job_idx is None:
-            return
+            return result
 
         # Parse day numbers
         day_numbers = []
@@ -116,17 +120,21 @@ class SelectableParser:
         normal_values = self.extract_normal_hours(df, num_days)
 
         for day_index, value in enumerate(normal_values, start=1):
-            self.master[f"TIMESHEET_DAY_{day_index}"] = value
+            result[f"TIMESHEET_DAY_{day_index}"] = value
+
+        return result
 
 
     # -----------------------------------------------------------------
     # MAIN ENTRY POINT
     # -----------------------------------------------------------------
-    def extract(self, dfs):
-        self.master["EMPLOYEE_NAME"] = self.name
-        self.master["PASSPORT_NUMBER"] = self.identifier
+    def extract(self, dfs, name=None, identifier=None):
+        master = {
+            "EMPLOYEE_NAME": self.name if name is None else name,
+            "PASSPORT_NUMBER": self.identifier if identifier is None else identifier,
+        }
 
         # timesheet always first table
-        self.extract_timesheet(dfs[0])
+        master.update(self.extract_timesheet(dfs[0]))
 
-        return self.master
+        return master
@@ -0,0 +1,18 @@
+import fitz
+
+def page_bytes(pdf, page_index=0):
+    """
+    Return a single page of `pdf` (path or bytes) as a standalone PDF in memory.
+    """
+    if isinstance(pdf, (bytes, bytearray)):
+        src = fitz.open(stream=bytes(pdf), filetype="pdf")
+    else:
+        src = fitz.open(pdf)
+
+    with src, fitz.open() as out:
+        out.insert_pdf(src, from_page=page_index, to_page=page_index)
+        # Keep /ID stable so the same page always yields the same bytes (cache keys)
+        return out.tobytes(garbage=1, no_new_id=True)
+
+def first_page_bytes(pdf):
+    return page_bytes(pdf, 0)
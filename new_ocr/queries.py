@@ -0,0 +1,90 @@
+from pymongo import ASCENDING, DESCENDING
+
+# Fields returned when the caller does not ask for anything else; the nested
+# timesheet/payslip documents are only fetched on request.
+SUMMARY_FIELDS = ("employee_id", "employee_name", "period_from", "period_to", "created_at")
+
+def _projection(fields):
+    return {field: 1 for field in fields}
+
+def _after(value):
+    """Condition for values sorting after `value` in an ascending sort."""
+    # null sorts before every other value, but {"$gt": None} matches nothing
+    return {"$ne": None} if value is None else {"$gt": value}
+
+class EmployeeRecordQueries:
+    """
+    Read helpers for the employee_records collection.
+
+    Every accessor is backed by one of the indexes created in
+    MongoDB.ensure_indexes, takes a `fields` projection and pages with a
+    keyset cursor: pass the returned `next_after` back as `after` to get the
+    following page (None when there are no more records).
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def employee_history(self, employee_id, fields=SUMMARY_FIELDS, page_size=50, after=None):
+        """Records of one employee, newest first (index: employee_history)."""
+        query = {"employee_id": employee_id}
+        if after:
+            created_at, last_id = after
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": last_id}},
+            ]
+
+        cursor = (self.collection.find(query, _projection(fields))
+                  .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+                  .limit(page_size))
+        docs = list(cursor)
+
+        next_after = None
+        if len(docs) == page_size:
+            next_after = (docs[-1].get("created_at"), docs[-1]["_id"])
+        return docs, next_after
+
+    def records_for_period(self, period_from, period_to=None, fields=SUMMARY_FIELDS, page_size=100, after=None):
+        """
+        All records of a pay period (index: period_employee). Ordered by
+        period_to, then employee, so the sort comes from the index whether
+        or not `period_to` is given.
+        """
+        query = {"period_from": period_from}
+        if period_to is not None:
+            query["period_to"] = period_to
+        if after:
+            last_to, employee_id, last_id = after
+            query["$or"] = [
+                {"period_to": _after(last_to)},
+                {"period_to": last_to, "employee_id": _after(employee_id)},
+                {"period_to": last_to, "employee_id": employee_id, "_id": {"$gt": last_id}},
+            ]
+
+        # the keyset fields are needed for next_after whatever the caller asked for
+        projection = _projection(tuple(fields) + ("period_to", "employee_id"))
+        cursor = (self.collection.find(query, projection)
+                  .sort([("period_to", ASCENDING), ("employee_id", ASCENDING), ("_id", ASCENDING)])
+                  .limit(page_size))
+        docs = list(cursor)
+
+        next_after = None
+        if len(docs) == page_size:
+            last = docs[-1]
+            next_after = (last.get("period_to"), last.get("employee_id"), last["_id"])
+        return docs, next_after
+
+    def latest_record(self, employee_id, fields=SUMMARY_FIELDS):
+        docs, _ = self.employee_history(employee_id, fields=fields, page_size=1)
+        return docs[0] if docs else None
+
+    def iter_pages(self, accessor, *args, **kwargs):
+        """Yield every page of `accessor` (e.g. self.records_for_period)."""
+        after = None
+        while True:
+            docs, after = accessor(*args, after=after, **kwargs)
+            if docs:
+                yield docs
+            if after is None:
+                return
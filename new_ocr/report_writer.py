@@ -0,0 +1,130 @@
+import os
+import json
+import tempfile
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+
+def _json_default(value):
+    # pd.NA / pd.NaT nested in lists/dicts become null, not the text "<NA>"
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    return str(value)
+
+
+def _cell_value(value):
+    # openpyxl only accepts scalars; lists/dicts (e.g. TIMESHEET_DAY_x) are stored as JSON text
+    if isinstance(value, (list, dict, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default)
+    # NaN, None, pd.NA and pd.NaT are written as empty cells (as DataFrame.to_excel did)
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    return value
+
+
+class ReportWriter:
+    """
+    Collects report rows and writes the workbook in one streaming pass.
+
+    Rows are kept in memory up to `buffer_size` and then spilled to a temporary
+    JSON Lines file. The column schema is the sorted union of every key seen.
+    The workbook is written on `close()` and, optionally, every
+    `checkpoint_every` records.
+    """
+
+    def __init__(self, excel_path, buffer_size=500, checkpoint_every=None, append=True):
+        self.excel_path = excel_path
+        self.buffer_size = buffer_size
+        self.checkpoint_every = checkpoint_every
+        self.columns = set()
+        self.count = 0
+        self._pending = 0
+        self._buffer = []
+        self._spill = None
+
+        if append and os.path.exists(excel_path):
+            self._load_existing()
+
+    # -------------------------------------------
+    # RECORDS
+    # -------------------------------------------
+    def add(self, record):
+        self._append(record)
+        self._pending += 1
+        if self.checkpoint_every and self._pending >= self.checkpoint_every:
+            self.checkpoint()
+
+    def _append(self, record):
+        row = {str(k): _cell_value(v) for k, v in record.items()}
+        self.columns.update(row)
+        self._buffer.append(row)
+        self.count += 1
+
+        if len(self._buffer) >= self.buffer_size:
+            self._spill_buffer()
+
+    def _load_existing(self):
+        # Read the previous report once so a rerun keeps appending to it
+        wb = load_workbook(self.excel_path, read_only=True)
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header:
+            header = [str(h) for h in header]
+            self.columns.update(header)
+            for values in rows:
+                self._append({k: v for k, v in zip(header, values) if v is not None})
+        wb.close()
+
+    def _spill_buffer(self):
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(mode="w+", encoding="utf-8", suffix=".jsonl")
+        for row in self._buffer:
+            self._spill.write(json.dumps(row, ensure_ascii=False, default=_json_default) + "\n")
+        self._buffer = []
+
+    def _iter_rows(self):
+        if self._spill is not None:
+            self._spill.flush()
+            self._spill.seek(0)
+            for line in self._spill:
+                yield json.loads(line)
+            self._spill.seek(0, os.SEEK_END)
+        yield from self._buffer
+
+    # -------------------------------------------
+    # WORKBOOK OUTPUT
+    # -------------------------------------------
+    def checkpoint(self):
+        columns = sorted(self.columns)
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(columns)
+        for row in self._iter_rows():
+            ws.append([row.get(c) for c in columns])
+
+        # Write next to the target and swap, so a crash never leaves a half-written report
+        tmp_path = self.excel_path + ".tmp"
+        wb.save(tmp_path)
+        os.replace(tmp_path, self.excel_path)
+        self._pending = 0
+        return self.excel_path
+
+    def close(self):
+        try:
+            if self._pending:
+                self.checkpoint()
+        finally:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+        return self.excel_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
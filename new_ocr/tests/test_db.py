@@ -0,0 +1,86 @@
+import mongomock
+import pytest
+
+from db import MongoDB
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for name in ("ts_1.pdf", "ps_1.pdf", "ts_2.pdf", "ps_2.pdf"):
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+    return paths
+
+
+def make_db(**kwargs):
+    return MongoDB(client=mongomock.MongoClient(), **kwargs)
+
+
+def insert(db, ts, ps, employee_id="E1"):
+    return db.insert_record({"IDENTIFIER": employee_id, "NAME": "Prakash"},
+                            {"PAYSLIP_PERIOD_FROM": "01-10-2025", "PAYSLIP_PERIOD_TO": "31-10-2025"},
+                            ts, ps)
+
+
+def test_flush_when_batch_size_reached(files):
+    db = make_db(batch_size=2, max_age=3600)
+    assert insert(db, files[0], files[1], "E1") is None
+    assert db.collection.count_documents({}) == 0
+
+    result = insert(db, files[2], files[3], "E2")
+    assert result.upserted_count == 2
+    assert db.collection.count_documents({}) == 2
+    assert db._buffer == []
+
+
+def test_close_flushes_buffer(files):
+    db = make_db(batch_size=100, max_age=3600)
+    insert(db, files[0], files[1])
+    assert db.collection.count_documents({}) == 0
+
+    db.close()
+    assert db.collection.count_documents({}) == 1
+
+
+def test_rerun_upserts_instead_of_duplicating(files):
+    client = mongomock.MongoClient()
+    for _ in range(2):
+        db = MongoDB(client=client, batch_size=100)
+        insert(db, files[0], files[1], "E1")
+        insert(db, files[2], files[3], "E2")
+        db.close()
+
+    collection = client["PDF_OCR"]["employee_records"]
+    assert collection.count_documents({}) == 2
+    record = collection.find_one({"employee_id": "E1"})
+    assert record["created_at"] <= record["updated_at"]
+    assert record["source_files"]["timesheet_pdf"] == files[0]
+
+
+def test_na_values_are_stored_as_null(files):
+    import numpy as np
+    import pandas as pd
+
+    db = make_db(batch_size=1)
+    db.insert_record({"IDENTIFIER": "E1", "DAYS": [np.int64(3), pd.NA]},
+                     {"PAYSLIP_BADGE": pd.NA, "TOTAL_ADDITION": pd.NA, "TOTAL_DEDUCTION": np.float64("nan"),
+                      "PAYSLIP_PERIOD_FROM": "01-10-2025", "PAYSLIP_PERIOD_TO": pd.NaT},
+                     files[0], files[1])
+
+    record = db.collection.find_one({"employee_id": "E1"})
+    assert record["payslip"]["TOTAL_ADDITION"] is None
+    assert record["payslip"]["TOTAL_DEDUCTION"] is None
+    assert record["period_to"] is None
+    assert record["timesheet"]["DAYS"] == [3, None]
+
+
+def test_unencodable_record_is_skipped_not_the_batch(files):
+    db = make_db(batch_size=3)
+    insert(db, files[0], files[1], "E1")
+    db.insert_record({"IDENTIFIER": "BAD", "NOTE": object()}, {}, files[2], files[3])
+    insert(db, files[2], files[3], "E3")
+
+    assert db._buffer == []
+    assert sorted(db.collection.distinct("employee_id")) == ["E1", "E3"]
@@ -0,0 +1,45 @@
+import os
+import shutil
+
+import main
+from ocr_extractor1 import OCRExtractor1
+from textract_client import StubTextractClient
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), "..", "..", "Payslip_Prakash.pdf")
+
+
+class FakePayslipExtractor:
+    def extract(self, ps_path):
+        if "broken" in ps_path:
+            raise ValueError("unreadable payslip")
+        return {"PAYSLIP_FILE": os.path.basename(ps_path)}
+
+
+def test_concurrent_results_share_one_textract_client(tmp_path, monkeypatch):
+    pairs = []
+    for i in range(12):
+        ts_path = tmp_path / f"Timesheets_Name E{i} Timesheets.pdf"
+        shutil.copy(SAMPLE_PDF, ts_path)
+        ps_name = "broken.pdf" if i == 5 else f"Payslip_Name E{i} PAYSLIP.pdf"
+        pairs.append((str(ts_path), str(tmp_path / ps_name)))
+
+    stub = StubTextractClient(latency=0.02, capacity=3, seed=0)
+    extractor = OCRExtractor1(client=stub, max_concurrency=6)
+    monkeypatch.setattr(main, "_payslip_extractor", FakePayslipExtractor())
+
+    try:
+        results = list(main._concurrent_results(pairs, extractor))
+    finally:
+        extractor.textract.close()
+
+    assert sorted(r[0] for r in results) == sorted(p for p, _ in pairs)
+    errors = {r[0]: r[4] for r in results if r[4]}
+    assert list(errors.values()) == ["unreadable payslip"]
+    for path, ps_path, result1, result2, error in results:
+        if not error:
+            assert result1["PASSPORT_NUMBER"] == os.path.basename(path).split()[1]
+            assert result2 == {"PAYSLIP_FILE": os.path.basename(ps_path)}
+
+    # calls overlapped, and the stub's throttles were retried
+    assert stub.max_in_flight > 1
+    assert extractor.textract.throttled == stub.throttled
@@ -0,0 +1,28 @@
+import mongomock
+
+from queries import EmployeeRecordQueries
+
+
+def test_records_for_period_pages_across_null_keys():
+    collection = mongomock.MongoClient().db.employee_records
+    employee_ids = [None, "E1", None, "E2", "E3", None, "E1"]
+    for i in range(42):
+        collection.insert_one({
+            "employee_id": employee_ids[i % len(employee_ids)],
+            "period_from": "01-10-2025",
+            "period_to": None if i % 3 == 0 else "31-10-2025",
+        })
+    collection.insert_one({"employee_id": "E9", "period_from": "01-11-2025", "period_to": "30-11-2025"})
+
+    queries = EmployeeRecordQueries(collection)
+    for page_size in (1, 4, 5, 100):
+        ids = [doc["_id"]
+               for page in queries.iter_pages(queries.records_for_period, "01-10-2025", page_size=page_size)
+               for doc in page]
+        assert len(ids) == 42
+        assert len(set(ids)) == 42
+
+    ids = [doc["_id"]
+           for page in queries.iter_pages(queries.records_for_period, "01-10-2025", "31-10-2025", page_size=3)
+           for doc in page]
+    assert len(set(ids)) == collection.count_documents({"period_to": "31-10-2025"})
@@ -0,0 +1,54 @@
+import pytest
+
+from textract_client import AIMDController, ConcurrentTextract, StubTextractClient
+
+
+def test_controller_increase_decrease():
+    controller = AIMDController(initial=4, maximum=8)
+
+    controller.acquire()
+    controller.release()
+    assert controller.limit == pytest.approx(4.25)
+
+    controller.acquire()
+    controller.release(throttled=True)
+    assert controller.limit == pytest.approx(2.125)
+
+    controller.acquire()
+    controller.release(succeeded=False)
+    assert controller.limit == pytest.approx(2.125)
+    assert controller.in_flight == 0
+
+
+def test_backs_off_under_throttling_and_retries_succeed():
+    # more than two calls in flight are throttled
+    stub = StubTextractClient(latency=0.01, capacity=2, response={"Blocks": ["ok"]}, seed=1)
+    controller = AIMDController(initial=8, maximum=8)
+
+    with ConcurrentTextract(stub, max_workers=8, controller=controller,
+                            max_retries=20, base_delay=0.001, max_delay=0.01) as textract:
+        results = list(textract.map(lambda i: textract.analyze_document(Document={"Bytes": b"%d" % i}),
+                                    range(40)))
+
+    assert [error for _, _, error in results] == [None] * 40
+    assert all(response == {"Blocks": ["ok"]} for _, response, _ in results)
+    assert stub.throttled > 0
+    assert textract.throttled == stub.throttled
+    assert textract.retries >= stub.throttled
+    assert controller.limit < 8
+
+
+class FailingClient:
+    def analyze_document(self, **kwargs):
+        raise ValueError("bad document")
+
+
+def test_non_retryable_error_does_not_raise_limit():
+    controller = AIMDController(initial=4, maximum=8)
+    with ConcurrentTextract(FailingClient(), max_workers=2, controller=controller) as textract:
+        with pytest.raises(ValueError):
+            textract.analyze_document(Document={"Bytes": b"x"})
+
+    assert controller.limit == 4
+    assert controller.in_flight == 0
+    assert textract.retries == 0
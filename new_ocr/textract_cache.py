@@ -0,0 +1,100 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+class TextractCache:
+    """
+    Content-addressed on-disk cache for Textract responses.
+
+    Entries are keyed by SHA-256 of the page bytes plus the FeatureTypes and
+    stored as gzip-compressed JSON. Reads refresh the file mtime, and when the
+    cache grows past `max_bytes` the least recently used entries are removed
+    until it is down to `low_water` of the cap, so the next puts do not have
+    to scan the directory again straight away.
+    """
+
+    def __init__(self, cache_dir=".textract_cache", max_bytes=512 * 1024 * 1024, low_water=0.9):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    def key(self, content, feature_types):
+        digest = hashlib.sha256(content)
+        digest.update(b"\0" + ",".join(sorted(feature_types)).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json.gz")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    # -------------------------------------------
+    # LOOKUP / STORE
+    # -------------------------------------------
+    def get(self, content, feature_types):
+        path = self._path(self.key(content, feature_types))
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                response = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # evicted by another worker since the read; the response is still good
+            pass
+        return response
+
+    def put(self, content, feature_types, response):
+        path = self._path(self.key(content, feature_types))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # ResponseMetadata is per-request noise, only the blocks are worth keeping
+        payload = {k: v for k, v in response.items() if k != "ResponseMetadata"}
+
+        try:
+            # overwriting an entry replaces its size rather than adding to it
+            old_size = os.path.getsize(path)
+        except FileNotFoundError:
+            old_size = 0
+
+        # unique per process and thread: ConcurrentTextract threads share one cache
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp_path, path)
+
+        self._size += os.path.getsize(path) - old_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        size = sum(e[2] for e in entries)
+        target = int(self.max_bytes * self.low_water)
+
+        for path, _, entry_size in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+        self._size = size
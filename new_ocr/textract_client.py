@@ -0,0 +1,193 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+THROTTLING_CODES = {
+    "ThrottlingException",
+    "ProvisionedThroughputExceededException",
+    "LimitExceededException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+}
+RETRYABLE_CODES = THROTTLING_CODES | {
+    "InternalServerError",
+    "ServiceUnavailable",
+    "ServiceUnavailableException",
+}
+
+def _error_code(exc):
+    response = getattr(exc, "response", None) or {}
+    return response.get("Error", {}).get("Code")
+
+def make_client(region="ap-south-1", max_pool_connections=16):
+    """
+    boto3 Textract client with a connection pool sized for `max_pool_connections`
+    concurrent calls. botocore retries are disabled, retries happen in
+    ConcurrentTextract so throttling is visible to the AIMD controller.
+    """
+    import boto3
+    from botocore.config import Config
+
+    config = Config(
+        max_pool_connections=max_pool_connections,
+        retries={"mode": "standard", "max_attempts": 1},
+    )
+    return boto3.client("textract", region_name=region, config=config)
+
+
+# -------------------------------------------
+# AIMD CONCURRENCY CONTROL
+# -------------------------------------------
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+    Each success adds `increase / limit` (about +increase per window of
+    requests), each throttle multiplies the limit by `decrease`; other
+    failures leave the limit as it is.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, increase=1.0, decrease=0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(initial)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= max(self.minimum, int(self.limit)):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled=False, succeeded=True):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+            elif succeeded:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+
+# -------------------------------------------
+# CONCURRENT CLIENT
+# -------------------------------------------
+class ConcurrentTextract:
+    """
+    Wraps a Textract client (boto3 or StubTextractClient) with AIMD-gated,
+    jittered-retry `analyze_document` calls and a thread pool for submission.
+    It exposes the same `analyze_document(**kwargs)` call as the client, so it
+    can be handed to OCRExtractor1 in place of a boto3 client.
+    """
+
+    def __init__(self, client=None, region="ap-south-1", max_workers=16, controller=None,
+                 max_retries=5, base_delay=0.5, max_delay=20.0):
+        self.client = client or make_client(region, max_workers)
+        self.max_workers = max_workers
+        self.controller = controller or AIMDController(initial=min(4, max_workers), maximum=max_workers)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttled = 0
+        self.retries = 0
+        self._counter_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def analyze_document(self, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.controller.acquire()
+            throttled = succeeded = False
+            try:
+                response = self.client.analyze_document(**kwargs)
+                succeeded = True
+                return response
+            except Exception as e:
+                code = _error_code(e)
+                throttled = code in THROTTLING_CODES
+                if code not in RETRYABLE_CODES or attempt == self.max_retries:
+                    raise
+            finally:
+                self.controller.release(throttled, succeeded)
+
+            # analyze_document runs on many threads at once
+            with self._counter_lock:
+                if throttled:
+                    self.throttled += 1
+                self.retries += 1
+            # full jitter exponential backoff
+            time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn, items):
+        """Run fn over items on the pool; yields (item, result, error) as they complete."""
+        futures = {self._executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# -------------------------------------------
+# LOCAL STUB (no AWS calls)
+# -------------------------------------------
+class StubThrottlingError(Exception):
+    def __init__(self, code="ThrottlingException"):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code, "Message": "Rate exceeded"}}
+
+class StubTextractClient:
+    """
+    Stand-in for the boto3 Textract client. Each call sleeps `latency`
+    (+/- `jitter`) seconds and throttles with probability `throttle_rate`, or
+    always when more than `capacity` calls are in flight.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, throttle_rate=0.0, capacity=None,
+                 response=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.capacity = capacity
+        self.response = response or {"Blocks": []}
+        self.calls = 0
+        self.throttled = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def analyze_document(self, Document=None, FeatureTypes=None):
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            over_capacity = self.capacity is not None and self._in_flight > self.capacity
+            throttle = over_capacity or self._random.random() < self.throttle_rate
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+        try:
+            time.sleep(delay)
+            if throttle:
+                with self._lock:
+                    self.throttled += 1
+                raise StubThrottlingError()
+            return self.response
+        finally:
+            with self._lock:
+                self._in_flight -= 1
@@ -0,0 +1,115 @@
+class TableGrid:
+    """
+    Row-major table built from Textract TABLE/CELL/WORD blocks.
+
+    `cells[r][c]` is the cell text (None where Textract returned no cell),
+    `confidences[r][c]` the CELL confidence. `spans` maps the 0-based
+    top-left (row, col) of every merged region to (row_span, col_span), and
+    `merged` maps the same anchor to the text of the whole region.
+    """
+
+    __slots__ = ("rows", "columns", "cells", "confidences", "spans", "merged")
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.cells = [[None] * columns for _ in range(rows)]
+        self.confidences = [[None] * columns for _ in range(rows)]
+        self.spans = {}
+        self.merged = {}
+
+    def value(self, row, col):
+        """Cell text, resolving cells covered by a merged region to the region text."""
+        for (r, c), (row_span, col_span) in self.spans.items():
+            if r <= row < r + row_span and c <= col < c + col_span:
+                return self.merged[(r, c)]
+        return self.cells[row][col]
+
+    def to_rows(self):
+        """Legacy format used by OCRParser: [{col (1-based): text}, ...] per non-empty row."""
+        out = []
+        for row in self.cells:
+            values = {c + 1: text for c, text in enumerate(row) if text is not None}
+            if values:
+                out.append(values)
+        return out
+
+
+def _child_ids(block):
+    rels = block.get("Relationships")
+    if not rels:
+        return ()
+    if len(rels) == 1:
+        rel = rels[0]
+        return rel["Ids"] if rel["Type"] == "CHILD" else ()
+    return [i for rel in rels if rel["Type"] == "CHILD" for i in rel["Ids"]]
+
+
+def parse_table_grids(response):
+    """
+    Build one TableGrid per TABLE block in a single pass over the blocks.
+    Only TABLE, CELL, MERGED_CELL and WORD blocks are indexed.
+    """
+    words = {}
+    cells = {}
+    merged_cells = []
+    tables = []
+
+    for block in response["Blocks"]:
+        block_type = block["BlockType"]
+        if block_type == "WORD":
+            words[block["Id"]] = block["Text"] if "Text" in block else ""
+        elif block_type == "CELL":
+            cells[block["Id"]] = block
+        elif block_type == "MERGED_CELL":
+            merged_cells.append(block)
+        elif block_type == "TABLE":
+            tables.append(block)
+
+    # cell id -> (grid, text) is only needed to resolve MERGED_CELL children
+    cell_index = {} if merged_cells else None
+    grids = []
+
+    for table in tables:
+        table_cells = [cells[cid] for cid in _child_ids(table) if cid in cells]
+        if not table_cells:
+            grids.append(TableGrid(0, 0))
+            continue
+
+        n_rows = max(c["RowIndex"] + c.get("RowSpan", 1) for c in table_cells) - 1
+        n_cols = max(c["ColumnIndex"] + c.get("ColumnSpan", 1) for c in table_cells) - 1
+        grid = TableGrid(n_rows, n_cols)
+
+        grid_cells = grid.cells
+        grid_confidences = grid.confidences
+        for cell in table_cells:
+            r = cell["RowIndex"] - 1
+            c = cell["ColumnIndex"] - 1
+            child_ids = _child_ids(cell)
+            text = " ".join([words[wid] for wid in child_ids if wid in words]) if child_ids else ""
+
+            grid_cells[r][c] = text
+            grid_confidences[r][c] = cell.get("Confidence")
+            if cell_index is not None:
+                cell_index[cell["Id"]] = (grid, text)
+
+            # Some responses mark spans on the CELL itself
+            row_span = cell.get("RowSpan", 1)
+            col_span = cell.get("ColumnSpan", 1)
+            if row_span > 1 or col_span > 1:
+                grid.spans[(r, c)] = (row_span, col_span)
+                grid.merged[(r, c)] = text
+
+        grids.append(grid)
+
+    for merged in merged_cells:
+        children = [cell_index[cid] for cid in _child_ids(merged) if cid in cell_index]
+        if not children:
+            continue
+        grid = children[0][0]
+        r = merged["RowIndex"] - 1
+        c = merged["ColumnIndex"] - 1
+        grid.spans[(r, c)] = (merged.get("RowSpan", 1), merged.get("ColumnSpan", 1))
+        grid.merged[(r, c)] = " ".join(text for _, text in children if text)
+
+    return grids
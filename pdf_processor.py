@@ -8,136 +8,506 @@
 # 👉 Works on Python 3.12.
 
 import pdfplumber
-from pdf2image import convert_from_path
-from paddleocr import PaddleOCR
-import layoutparser as lp
+import fitz
 from PIL import Image
+import os
 import json
+import queue
+import threading
 
 # ---------- CONFIG ----------
-ocr_text = PaddleOCR(show_log=False)
-ocr_table = PaddleOCR(show_log=False, structure=True)
+# PaddleOCR / Detectron2 are loaded on first use (see model_registry.py),
+# so text-only PDFs never load them.
+from model_registry import registry, text_ocr, table_ocr, table_detector
+from table_crops import CropOptions, table_bboxes, ocr_table_regions, mask_regions
+from batching import MicroBatcher, detect_batch
+from table_html import extract_key_value_pairs
+from jsonl_output import JsonlPageWriter, last_written_page, json_default
+from preprocess import PreprocessOptions, BINARIZE_METHODS, preprocess_image
 
-table_detector = lp.Detectron2LayoutModel(
-    "lp://TableBank/faster_rcnn_R_50_FPN",
-    extra_config={"MODEL.ROI_HEADS.SCORE_THRESH_TEST": 0.5},
-    label_map={0: "Table"}
-)
+# ---------- RASTERIZATION ----------
+# PIL mode for each supported colorspace
+COLORSPACES = {
+    "RGB": (fitz.csRGB, "RGB"),
+    "GRAY": (fitz.csGRAY, "L"),
+    "L": (fitz.csGRAY, "L"),
+    "CMYK": (fitz.csCMYK, "CMYK"),
+}
 
-# ---------- HELPERS ----------
-def extract_key_value_pairs(table_data):
+# PyMuPDF does not support use from several threads at once (not even with
+# separate documents), so every fitz call of the rasterizers is serialized.
+# The pdfplumber text extraction of the rasterize stage still runs in parallel.
+_FITZ_LOCK = threading.Lock()
+
+class PageRasterizer:
     """
-    Convert PaddleOCR PP-Structure result into key-value pairs.
+    Renders pages of one PDF in-process with PyMuPDF. The document is opened
+    once; each page is rendered only when asked for and its pixmap is freed
+    as soon as the PIL image is built, so memory stays at about one page.
+    Defaults match pdf2image.convert_from_path (200 DPI, RGB). Safe to use
+    from several threads: all PyMuPDF calls hold _FITZ_LOCK.
     """
-    final_tables = []
 
-    for entry in table_data:
-        if "html" not in entry:
-            continue
+    def __init__(self, pdf, dpi=200, colorspace="RGB"):
+        if colorspace.upper() not in COLORSPACES:
+            raise ValueError(f"Unsupported colorspace: {colorspace}")
+        self.colorspace, self.mode = COLORSPACES[colorspace.upper()]
+        self.dpi = dpi
+        self.matrix = fitz.Matrix(dpi / 72, dpi / 72)
+        # pdf is a file path or the PDF bytes
+        with _FITZ_LOCK:
+            if isinstance(pdf, (bytes, bytearray)):
+                self.doc = fitz.open(stream=bytes(pdf), filetype="pdf")
+            else:
+                self.doc = fitz.open(pdf)
+
+    def __len__(self):
+        with _FITZ_LOCK:
+            return len(self.doc)
+
+    def render(self, page_index):
+        with _FITZ_LOCK:
+            page = self.doc.load_page(page_index)
+            pix = page.get_pixmap(matrix=self.matrix, colorspace=self.colorspace, alpha=False)
+            img = Image.frombytes(self.mode, (pix.width, pix.height), pix.samples)
+            del pix, page
+        return img
+
+    def __iter__(self):
+        """Lazily yield (page_index, image) for every page."""
+        for page_index in range(len(self)):
+            yield page_index, self.render(page_index)
+
+    def close(self):
+        with _FITZ_LOCK:
+            self.doc.close()
 
-        # Extract from HTML table — rows and cells
-        html_content = entry["html"]
+    def __enter__(self):
+        return self
 
-        # simple HTML table extraction using BeautifulSoup (optional)
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html_content, "html.parser")
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
-        rows = []
-        for tr in soup.find_all("tr"):
-            cols = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
-            if cols:
-                rows.append(cols)
 
-        if not rows:
-            continue
+def render_dpi(dpi, preprocess=None):
+    """DPI to rasterize at: no point rendering sharper than preprocessing keeps."""
+    if preprocess is not None and preprocess.target_dpi:
+        return min(dpi, preprocess.target_dpi)
+    return dpi
+
+
+# ---------- PAGE STAGES ----------
+def read_page(page, page_index, rasterizer, preprocess=None):
+    """
+    Stage 1: text pages are finished here, scanned pages are rasterized
+    and, with `preprocess` (preprocess.PreprocessOptions), preprocessed.
+    The preprocessing report is kept in the image's info["preprocess"].
+    Returns (entry, None) or (None, image).
+    """
+    text = page.extract_text()
+
+    # ---------------------------
+    # CASE 1: Page contains real text
+    # ---------------------------
+    if text and text.strip():
+        return {
+            "page": page_index + 1,
+            "type": "text",
+            "data": text
+        }, None
+
+    # ---------------------------
+    # CASE 2: Page contains images (scanned page)
+    # ---------------------------
+    # Convert page → image (document is already open, only this page is rendered)
+    pil_img = rasterizer.render(page_index)
+    if preprocess is not None:
+        pil_img, report = preprocess_image(pil_img, preprocess, rasterizer.dpi)
+        pil_img.info["preprocess"] = report
+    return None, pil_img
+
+
+def detect_tables(pil_img, detector):
+    """Stage 2: table regions found by the layout model."""
+    layout = detector.detect(pil_img)
+    return [b for b in layout if b.type == "Table"]
+
+
+def ocr_page(page_index, pil_img, tables, instance=0, options=CropOptions()):
+    """
+    Stage 3: structure OCR on the detected table crops only, plain OCR for
+    pages without tables. `instance` picks the registry model copies used by
+    this caller (crop workers take the next options.workers table models).
+    """
+    # ---------------------------
+    # If table image
+    # ---------------------------
+    if tables:
+        print(" → Detected table")
+        boxes = table_bboxes(tables, pil_img.size, options.padding)
+        result = ocr_table_regions(
+            pil_img, boxes,
+            lambda worker: table_ocr(instance * options.workers + worker),
+            options.workers,
+        )
+        kv = extract_key_value_pairs(result)
+        entry = {
+            "page": page_index + 1,
+            "type": "table",
+            "table_bboxes": [list(b) for b in boxes],
+            "raw_ocr": result,
+            "key_value_pairs": kv
+        }
+        if options.ocr_remainder:
+            remainder = text_ocr(instance).ocr(mask_regions(pil_img, boxes)) or []
+            entry["remainder_text"] = "\n".join([line[1][0] for line in remainder])
+        if "preprocess" in pil_img.info:
+            entry["preprocess"] = pil_img.info["preprocess"]
+        return entry
 
-        header = rows[0]
-        kv_list = []
-        for row in rows[1:]:
-            kv_list.append(dict(zip(header, row)))
+    # ---------------------------
+    # If just text image
+    # ---------------------------
+    print(" → Detected text image")
+    result = text_ocr(instance).ocr(pil_img)
+    text_data = "\n".join([line[1][0] for line in result])
+    entry = {
+        "page": page_index + 1,
+        "type": "text_image",
+        "data": text_data
+    }
+    if "preprocess" in pil_img.info:
+        entry["preprocess"] = pil_img.info["preprocess"]
+    return entry
 
-        final_tables.append(kv_list)
 
-    return final_tables
+def process_page(page, page_index, rasterizer, options=CropOptions(), preprocess=None):
+    entry, pil_img = read_page(page, page_index, rasterizer, preprocess)
+    if entry is not None:
+        return entry
+    tables = detect_tables(pil_img, table_detector())
+    return ocr_page(page_index, pil_img, tables, options=options)
 
 
 # ---------- MAIN PDF PROCESSOR ----------
-def process_pdf(pdf_path):
-    output = []
-    pdf = pdfplumber.open(pdf_path)
-
-    for page_index, page in enumerate(pdf.pages):
-        print(f"Processing page {page_index+1}/{len(pdf.pages)}")
-
-        text = page.extract_text()
-
-        # ---------------------------
-        # CASE 1: Page contains real text
-        # ---------------------------
-        if text and text.strip():
-            output.append({
-                "page": page_index + 1,
-                "type": "text",
-                "data": text
-            })
-            continue
-
-        # ---------------------------
-        # CASE 2: Page contains images (scanned page)
-        # ---------------------------
-        # Convert page → image
-        pil_img = convert_from_path(
-            pdf_path,
-            first_page=page_index+1,
-            last_page=page_index+1
-        )[0]
-
-        # Detect tables in image
-        layout = table_detector.detect(pil_img)
-        tables = [b for b in layout if b.type == "Table"]
-
-        # ---------------------------
-        # If table image
-        # ---------------------------
-        if tables:
-            print(" → Detected table")
-            result = ocr_table.ocr(pil_img, cls=True)
-            kv = extract_key_value_pairs(result)
-            output.append({
-                "page": page_index + 1,
-                "type": "table",
-                "raw_ocr": result,
-                "key_value_pairs": kv
-            })
-        else:
-            # ---------------------------
-            # If just text image
-            # ---------------------------
-            print(" → Detected text image")
-            result = ocr_text.ocr(pil_img)
-            text_data = "\n".join([line[1][0] for line in result])
-            output.append({
-                "page": page_index + 1,
-                "type": "text_image",
-                "data": text_data
-            })
-
-    return output
+def process_pdf(pdf_path, dpi=200, colorspace="RGB", workers=None, queue_size=4, crop_options=CropOptions(),
+                batch_size=1, max_wait=0.05, preprocess=None):
+    """
+    All page results as a list; see iter_process_pdf for the options.
+    """
+    return list(iter_process_pdf(pdf_path, dpi, colorspace, workers, queue_size, crop_options,
+                                 batch_size, max_wait, preprocess=preprocess))
+
+
+def iter_process_pdf(pdf_path, dpi=200, colorspace="RGB", workers=None, queue_size=4, crop_options=CropOptions(),
+                     batch_size=1, max_wait=0.05, start_page=0, preprocess=None):
+    """
+    Yield page results in page order as they are finished, starting at the
+    0-based `start_page`.
+
+    `workers` switches on the pipelined mode: a dict with the number of
+    threads for the "rasterize", "detect" and "ocr" stages (missing stages
+    get 1). Without it pages are processed one after another.
+    `crop_options` (table_crops.CropOptions) sets the table crop padding,
+    concurrent crops and whether the non-table remainder is text-OCR'd.
+    `batch_size` > 1 runs table detection on that many scanned pages per
+    forward pass (in the pipelined mode batches also close after `max_wait`
+    seconds).
+    `preprocess` (preprocess.PreprocessOptions) downscales, deskews and
+    binarizes scanned pages before detection; pages are then rendered at
+    no more than its target_dpi. Entries of those pages carry the
+    preprocessing report (scale, skew angle, seconds per step).
+    """
+    if workers:
+        return iter_pipelined(pdf_path, dpi, colorspace, workers, queue_size, crop_options,
+                              batch_size, max_wait, start_page, preprocess)
+
+    if batch_size > 1:
+        return iter_batched(pdf_path, dpi, colorspace, crop_options, batch_size, start_page, preprocess)
+
+    return iter_serial(pdf_path, dpi, colorspace, crop_options, start_page, preprocess)
+
+
+def process_pdf_to_jsonl(pdf_path, out_path, raw_ocr="off", resume=True, **options):
+    """
+    Stream page results to `out_path` as JSON Lines, one flushed line per
+    page. raw_ocr is "off", "sidecar" (gzip file per page) or "inline".
+    With `resume`, pages already in the file are skipped. `options` are
+    passed to iter_process_pdf. Returns the number of pages written.
+    """
+    start_page = last_written_page(out_path) if resume else 0
+    if not resume and os.path.exists(out_path):
+        os.remove(out_path)
+    if start_page:
+        print(f"Resuming after page {start_page}")
+
+    with JsonlPageWriter(out_path, raw_ocr) as writer:
+        for entry in iter_process_pdf(pdf_path, start_page=start_page, **options):
+            writer.write(entry)
+        return writer.pages
+
+
+def iter_serial(pdf_path, dpi=200, colorspace="RGB", crop_options=CropOptions(), start_page=0, preprocess=None):
+    with pdfplumber.open(pdf_path) as pdf, \
+            PageRasterizer(pdf_path, render_dpi(dpi, preprocess), colorspace) as rasterizer:
+        for page_index in range(start_page, len(pdf.pages)):
+            page = pdf.pages[page_index]
+            print(f"Processing page {page_index+1}/{len(pdf.pages)}")
+            entry = process_page(page, page_index, rasterizer, crop_options, preprocess)
+            # drop pdfplumber's cached layout objects for this page
+            page.close()
+            yield entry
+
+
+def iter_batched(pdf_path, dpi=200, colorspace="RGB", crop_options=CropOptions(), batch_size=8, start_page=0,
+                 preprocess=None):
+    """
+    Serial mode with batched detection: scanned pages are buffered until
+    `batch_size` are waiting, detected in one call, then OCR'd. Only one
+    batch of page images is held in memory.
+    """
+    pending = []      # (page_index, image) waiting for detection
+    ready = []        # finished entries, in page order
+
+    def flush():
+        layouts = detect_batch(table_detector(), [img for _, img in pending])
+        for (page_index, pil_img), layout in zip(pending, layouts):
+            tables = [b for b in layout if b.type == "Table"]
+            ready[ready.index(page_index)] = ocr_page(page_index, pil_img, tables, options=crop_options)
+        pending.clear()
+
+    with pdfplumber.open(pdf_path) as pdf, \
+            PageRasterizer(pdf_path, render_dpi(dpi, preprocess), colorspace) as rasterizer:
+        for page_index in range(start_page, len(pdf.pages)):
+            page = pdf.pages[page_index]
+            print(f"Processing page {page_index+1}/{len(pdf.pages)}")
+            entry, pil_img = read_page(page, page_index, rasterizer, preprocess)
+            page.close()
+            if entry is not None and not pending:
+                yield entry
+                continue
+            # keep order: pages after a pending scanned page wait for its batch
+            if entry is not None:
+                ready.append(entry)
+                continue
+            ready.append(page_index)
+            pending.append((page_index, pil_img))
+            if len(pending) >= batch_size:
+                flush()
+                yield from ready
+                ready.clear()
+        if pending:
+            flush()
+        yield from ready
+
+
+# ---------- PIPELINED MODE ----------
+_DONE = object()
+
+class _Failed:
+    def __init__(self, page_index, error):
+        self.page_index = page_index
+        self.error = error
+
+def _stage(name, n_workers, inbox, outbox, make_worker, cancelled=None):
+    """
+    Start `n_workers` threads that apply make_worker(worker_index)(item) to
+    items from inbox and put the results on outbox (None results are
+    dropped). Items are (page_index, ...) tuples. Once every worker has seen
+    _DONE, a single _DONE is forwarded downstream. Failures are passed on as
+    _Failed so downstream stages never block waiting for a lost page. Once
+    `cancelled` is set, remaining items are dropped instead of processed.
+    """
+    def run(worker_index):
+        try:
+            handle = make_worker(worker_index)
+        except Exception as e:
+            # keep draining so upstream stages never block on a full queue
+            def handle(item, error=e):
+                raise error
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # let the sibling workers of this stage see it too
+                inbox.put(_DONE)
+                return
+            if cancelled is not None and cancelled.is_set():
+                continue
+            if isinstance(item, _Failed):
+                outbox.put(item)
+                continue
+            try:
+                result = handle(item)
+            except Exception as e:
+                result = _Failed(item[0], e)
+            if result is not None:
+                outbox.put(result)
+
+    threads = [threading.Thread(target=run, args=(i,), name=f"{name}-{i}", daemon=True)
+               for i in range(n_workers)]
+    for t in threads:
+        t.start()
+
+    def close():
+        for t in threads:
+            t.join()
+        outbox.put(_DONE)
+
+    threading.Thread(target=close, name=f"{name}-close", daemon=True).start()
+
+
+def iter_pipelined(pdf_path, dpi=200, colorspace="RGB", workers=None, queue_size=4,
+                   crop_options=CropOptions(), batch_size=1, max_wait=0.05, start_page=0, preprocess=None):
+    """
+    rasterize → detect → OCR as three thread stages joined by bounded queues,
+    so rendering, layout detection and OCR of different pages overlap. Each
+    rasterize worker opens its own copy of the document; their PyMuPDF
+    renders take turns (_FITZ_LOCK) while text extraction and preprocessing
+    run in parallel. Each detect/OCR worker gets its own model instance from
+    the registry. Results are yielded in page order as soon as all earlier
+    pages are done; a failing page re-raises its exception at its place in
+    that order. Closing the generator early cancels the pages not started
+    yet.
+
+    With batch_size > 1 the detect workers hand their pages to one
+    MicroBatcher that runs the detector on up to batch_size pages at a time;
+    at least batch_size detect workers are started so batches can fill.
+    """
+    workers = workers or {}
+    n_rasterize = workers.get("rasterize", 1)
+    n_detect = workers.get("detect", 1)
+    n_ocr = workers.get("ocr", 1)
+
+    batcher = None
+    if batch_size > 1:
+        batcher = MicroBatcher(lambda images: detect_batch(table_detector(), images), batch_size, max_wait)
+        n_detect = max(n_detect, batch_size)
+
+    with pdfplumber.open(pdf_path) as pdf:
+        n_pages = len(pdf.pages)
+
+    pages_q = queue.Queue()
+    detect_q = queue.Queue(maxsize=queue_size)
+    ocr_q = queue.Queue(maxsize=queue_size)
+    results_q = queue.Queue()
+    for page_index in range(start_page, n_pages):
+        pages_q.put((page_index,))
+    pages_q.put(_DONE)
+
+    open_docs = []
+
+    def rasterize_worker(worker_index):
+        pdf = pdfplumber.open(pdf_path)
+        rasterizer = PageRasterizer(pdf_path, render_dpi(dpi, preprocess), colorspace)
+        open_docs.append((pdf, rasterizer))
+
+        def handle(item):
+            page_index = item[0]
+            print(f"Processing page {page_index+1}/{n_pages}")
+            page = pdf.pages[page_index]
+            entry, pil_img = read_page(page, page_index, rasterizer, preprocess)
+            page.close()
+            if entry is not None:
+                # text pages skip the model stages
+                results_q.put(entry)
+                return None
+            return page_index, pil_img
+        return handle
+
+    def detect_worker(worker_index):
+        def handle(item):
+            page_index, pil_img = item
+            if batcher is not None:
+                tables = [b for b in batcher.submit(pil_img).result() if b.type == "Table"]
+            else:
+                tables = detect_tables(pil_img, table_detector(worker_index))
+            return page_index, pil_img, tables
+        return handle
+
+    def ocr_worker(worker_index):
+        def handle(item):
+            page_index, pil_img, tables = item
+            return ocr_page(page_index, pil_img, tables, worker_index, crop_options)
+        return handle
+
+    cancelled = threading.Event()
+    _stage("rasterize", n_rasterize, pages_q, detect_q, rasterize_worker, cancelled)
+    _stage("detect", n_detect, detect_q, ocr_q, detect_worker, cancelled)
+    _stage("ocr", n_ocr, ocr_q, results_q, ocr_worker, cancelled)
+
+    # page_index -> entry or _Failed, until every earlier page is out
+    waiting = {}
+    next_page = start_page
+    finished = False
+    try:
+        while not finished:
+            item = results_q.get()
+            if item is _DONE:
+                finished = True
+            elif isinstance(item, _Failed):
+                waiting[item.page_index] = item
+            else:
+                waiting[item["page"] - 1] = item
+
+            while next_page in waiting:
+                item = waiting.pop(next_page)
+                next_page += 1
+                if isinstance(item, _Failed):
+                    raise item.error
+                yield item
+    finally:
+        if not finished:
+            cancelled.set()
+            while results_q.get() is not _DONE:
+                pass
+        for pdf, rasterizer in open_docs:
+            pdf.close()
+            rasterizer.close()
+        if batcher is not None:
+            batcher.close()
 
 
 # ---------- RUN ----------
 if __name__ == "__main__":
-    pdf_path = "input.pdf"
-    final_output = process_pdf(pdf_path)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract text and tables from a PDF.")
+    parser.add_argument("pdf", nargs="?", default="input.pdf")
+    parser.add_argument("--output", default=None, help="output.json, or output.jsonl with --jsonl")
+    parser.add_argument("--jsonl", action="store_true", help="Stream one JSON line per page")
+    parser.add_argument("--raw-ocr", choices=["off", "sidecar", "inline"], default="off",
+                        help="Where raw OCR goes in --jsonl mode")
+    parser.add_argument("--no-resume", action="store_true", help="Start the JSONL output over")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="Downscale, grayscale and deskew scanned pages before OCR")
+    parser.add_argument("--target-dpi", type=int, default=200, help="Resolution cap with --preprocess")
+    parser.add_argument("--binarize", choices=BINARIZE_METHODS, default=None, help="Threshold with --preprocess")
+    args = parser.parse_args()
+
+    preprocess = None
+    if args.preprocess:
+        preprocess = PreprocessOptions(target_dpi=args.target_dpi, binarize=args.binarize)
+
+    if args.jsonl:
+        out_path = args.output or "output.jsonl"
+        pages = process_pdf_to_jsonl(args.pdf, out_path, raw_ocr=args.raw_ocr, resume=not args.no_resume,
+                                     preprocess=preprocess)
+        print(f"\nDONE. {pages} pages appended to {out_path}")
+    else:
+        out_path = args.output or "output.json"
+        final_output = process_pdf(args.pdf, preprocess=preprocess)
+
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(final_output, f, indent=4, ensure_ascii=False, default=json_default)
 
-    with open("output.json", "w", encoding="utf-8") as f:
-        json.dump(final_output, f, indent=4, ensure_ascii=False)
+        print(f"\nDONE. Saved to {out_path}")
 
-    print("\nDONE. Saved to output.json")
+    for name, stats in registry.stats().items():
+        print(f"{name}: loaded in {stats['load_seconds']:.1f}s, RSS after load {stats['rss_mb']} MB")
 
 
 # Install Dependencies
-# pip install pdfplumber pdf2image paddleocr pillow layoutparser opencv-python
+# pip install pdfplumber pymupdf paddleocr pillow layoutparser opencv-python
 # You must also install Detectron2(one-time install)
 # pip install 'git+https://github.com/facebookresearch/detectron2.git'
 #Thats It
@@ -0,0 +1,165 @@
+# CPU image preprocessing before detection / OCR.
+#
+# Phone captures of timesheets are often ~4000px wide and a few degrees
+# skewed. preprocess_image() runs, in this order and each step optional:
+#   grayscale  drop the colour channels (first, so later steps touch 1/3 of the data)
+#   downscale  cap the resolution at `target_dpi` (INTER_AREA)
+#   deskew     rotate by the skew angle found with a projection profile
+#   binarize   Otsu or adaptive (Gaussian) threshold
+# and times every step. The result is always an RGB PIL image, since the
+# layout model and PaddleOCR expect three channels.
+
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+BINARIZE_METHODS = ("otsu", "adaptive")
+
+# target_dpi:     downscale to this resolution when the source is sharper (None keeps it)
+# grayscale:      convert to grayscale (implied by binarize)
+# deskew:         detect and undo skew up to +/- max_skew degrees
+# binarize:       None, "otsu" or "adaptive"
+# max_skew:       largest skew angle searched, in degrees
+# page_width_in:  page width assumed when the source DPI is unknown (A4)
+PreprocessOptions = namedtuple(
+    "PreprocessOptions",
+    ["target_dpi", "grayscale", "deskew", "binarize", "max_skew", "page_width_in"],
+    defaults=(200, True, True, None, 10.0, 8.27),
+)
+
+# width of the thumbnail the skew angle is searched on
+SKEW_THUMB_WIDTH = 1000
+
+
+def estimate_dpi(img, page_width_in=8.27):
+    """Resolution of a page image, assuming it spans `page_width_in` inches."""
+    return img.width / page_width_in
+
+
+def downscale(arr, scale):
+    height, width = arr.shape[:2]
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(arr, size, interpolation=cv2.INTER_AREA)
+
+
+def to_gray(arr):
+    return arr if arr.ndim == 2 else cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
+
+
+def _profile_score(ys, xs, angle):
+    """
+    Sharpness of the row profile of the ink pixels (ys, xs) after a rotation
+    by `angle` degrees; the same rotation as cv2.getRotationMatrix2D, done on
+    the coordinates instead of warping the image.
+    """
+    theta = np.deg2rad(angle)
+    rows = ys * np.cos(theta) - xs * np.sin(theta)
+    profile = np.bincount((rows - rows.min()).astype(np.intp))
+    return float(np.sum(np.diff(profile).astype(np.float64) ** 2))
+
+
+def skew_angle(gray, max_skew=10.0):
+    """
+    Rotation (degrees, counter-clockwise) that straightens the text lines
+    and table rules of a grayscale page: the angle whose row profile of ink
+    pixels has the sharpest peaks. Searched in 1 degree steps, then 0.1
+    degree steps around the best one, on a thumbnail.
+    """
+    scale = min(1.0, SKEW_THUMB_WIDTH / gray.shape[1])
+    thumb = downscale(gray, scale) if scale < 1.0 else gray
+    _, mask = cv2.threshold(thumb, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    ys, xs = np.nonzero(mask)
+    if len(ys) < 100:
+        return 0.0
+    ys = ys.astype(np.float32)
+    xs = xs.astype(np.float32)
+
+    coarse = np.arange(-max_skew, max_skew + 0.5, 1.0)
+    best = max(coarse, key=lambda a: _profile_score(ys, xs, a))
+    fine = np.arange(best - 1.0, best + 1.05, 0.1)
+    best = max(fine, key=lambda a: _profile_score(ys, xs, a))
+    return round(float(best), 2)
+
+
+def rotate(arr, angle):
+    """`arr` rotated by `angle` degrees on a white canvas grown to keep the corners."""
+    height, width = arr.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(round(height * sin + width * cos))
+    new_height = int(round(height * cos + width * sin))
+    matrix[0, 2] += (new_width - width) / 2
+    matrix[1, 2] += (new_height - height) / 2
+    white = 255 if arr.ndim == 2 else (255,) * arr.shape[2]
+    return cv2.warpAffine(arr, matrix, (new_width, new_height), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=white)
+
+
+def binarize(gray, method="otsu", dpi=200):
+    if method == "otsu":
+        _, out = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        return out
+    if method == "adaptive":
+        # neighbourhood of about 1/8 inch, odd as OpenCV requires
+        block = max(3, int(dpi / 8) | 1)
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 10)
+    raise ValueError(f"binarize must be one of {BINARIZE_METHODS}")
+
+
+def preprocess_image(img, options=PreprocessOptions(), source_dpi=None):
+    """
+    Run the preprocessing steps of `options` on a PIL image. `source_dpi` is
+    the image resolution if known (PDF renders), otherwise it is estimated
+    from the image width. Returns (RGB PIL image, report) where the report
+    holds the applied `scale` and `skew_angle` (to map coordinates back to
+    the original image) and the `seconds` spent in each step.
+    """
+    if options.binarize is not None and options.binarize not in BINARIZE_METHODS:
+        raise ValueError(f"binarize must be one of {BINARIZE_METHODS}")
+
+    seconds = {}
+    start = step_start = time.perf_counter()
+
+    def lap(step):
+        nonlocal step_start
+        now = time.perf_counter()
+        seconds[step] = round(now - step_start, 4)
+        step_start = now
+
+    gray = options.grayscale or options.binarize
+    mode = "L" if gray else "RGB"
+    arr = np.asarray(img if img.mode == mode else img.convert(mode))
+    lap("grayscale" if gray else "load")
+
+    dpi = source_dpi or estimate_dpi(img, options.page_width_in)
+    scale = 1.0
+    if options.target_dpi and dpi > options.target_dpi:
+        scale = options.target_dpi / dpi
+        arr = downscale(arr, scale)
+        dpi = options.target_dpi
+        lap("downscale")
+
+    angle = 0.0
+    if options.deskew:
+        angle = skew_angle(to_gray(arr), options.max_skew)
+        # below 0.1 degree a rotation only blurs the image
+        if abs(angle) >= 0.1:
+            arr = rotate(arr, angle)
+        else:
+            angle = 0.0
+        lap("deskew")
+
+    if options.binarize:
+        arr = binarize(arr, options.binarize, dpi)
+        lap("binarize")
+
+    if arr.ndim == 2:
+        arr = cv2.cvtColor(arr, cv2.COLOR_GRAY2RGB)
+    out = Image.fromarray(arr)
+    lap("output")
+
+    seconds["total"] = round(time.perf_counter() - start, 4)
+    return out, {"scale": round(scale, 4), "skew_angle": angle, "seconds": seconds}
@@ -0,0 +1,78 @@
+# Structure OCR on detected table regions only.
+#
+# The layout model already gives the table boxes, so instead of running
+# PP-Structure over the whole page each (padded) table box is cropped and
+# OCR'd on its own. Crops can be processed concurrently; the non-table
+# remainder of the page is only sent to the cheaper text OCR on request.
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from PIL import ImageDraw
+
+# padding:        pixels added around each detected table box
+# workers:        crops OCR'd concurrently (one model instance per worker)
+# ocr_remainder:  also run text OCR on the page with the tables blanked out
+CropOptions = namedtuple("CropOptions", ["padding", "workers", "ocr_remainder"], defaults=(10, 1, False))
+
+
+def table_bboxes(tables, image_size, padding=10):
+    """Integer (x0, y0, x1, y1) boxes of layoutparser blocks, padded and clipped to the image."""
+    width, height = image_size
+    boxes = []
+    for block in tables:
+        x0, y0, x1, y1 = block.coordinates
+        boxes.append((
+            max(0, int(x0) - padding),
+            max(0, int(y0) - padding),
+            min(width, int(round(x1)) + padding),
+            min(height, int(round(y1)) + padding),
+        ))
+    return boxes
+
+
+def _shift(entry, x0, y0):
+    """Move a PP-Structure entry's bbox from crop to page coordinates."""
+    bbox = entry.get("bbox") if isinstance(entry, dict) else None
+    if bbox is None or len(bbox) != 4:
+        return entry
+    entry = dict(entry)
+    entry["bbox"] = [bbox[0] + x0, bbox[1] + y0, bbox[2] + x0, bbox[3] + y0]
+    return entry
+
+
+def ocr_table_regions(img, boxes, model_for, workers=1):
+    """
+    Run structure OCR on each box of `img`. `model_for(i)` returns the model
+    used by worker i. Returns the entries of all crops, in box order, with
+    bboxes in page coordinates.
+    """
+    def run(worker_index, indices):
+        model = model_for(worker_index)
+        out = {}
+        for i in indices:
+            x0, y0 = boxes[i][:2]
+            result = model.ocr(img.crop(boxes[i]), cls=True) or []
+            out[i] = [_shift(entry, x0, y0) for entry in result]
+        return out
+
+    workers = max(1, min(workers, len(boxes)))
+    # round-robin the crops over the workers, each with its own model instance
+    groups = [range(w, len(boxes), workers) for w in range(workers)]
+    if workers == 1:
+        per_box = run(0, groups[0])
+    else:
+        per_box = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for out in executor.map(run, range(workers), groups):
+                per_box.update(out)
+
+    return [entry for i in range(len(boxes)) for entry in per_box[i]]
+
+
+def mask_regions(img, boxes, fill="white"):
+    """Copy of `img` with the given boxes painted over."""
+    masked = img.copy()
+    draw = ImageDraw.Draw(masked)
+    for box in boxes:
+        draw.rectangle(box, fill=fill)
+    return masked
@@ -0,0 +1,149 @@
+# Streaming parser for the table HTML produced by PP-Structure.
+#
+# One regex pass over the markup: tags open/close cells and rows, the text
+# between tags is collected for the open cell. No tree is built. Cell text
+# follows BeautifulSoup's get_text(strip=True): every text piece is
+# unescaped and stripped, empty pieces are dropped and the rest joined
+# without a separator. rowspan/colspan are expanded, so a spanning cell's
+# text appears in every grid position it covers.
+
+import re
+from html import unescape
+
+TAG = re.compile(r"<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>", re.S)
+SPAN_ATTR = re.compile(r"""\b(rowspan|colspan)\s*=\s*["']?\s*(\d+)""", re.I)
+
+
+def _spans(attrs):
+    rowspan = colspan = 1
+    for name, value in SPAN_ATTR.findall(attrs):
+        if name.lower() == "rowspan":
+            rowspan = max(1, int(value))
+        else:
+            colspan = max(1, int(value))
+    return rowspan, colspan
+
+
+def _layout_row(cells, carry):
+    """
+    Place one row's (text, rowspan, colspan) cells around the cells carried
+    down from rows above. `carry` maps column -> [text, rows left] and is
+    updated in place.
+    """
+    row = []
+    col = 0
+
+    def take_carried():
+        nonlocal col
+        while col in carry:
+            text, left = carry[col]
+            row.append(text)
+            if left == 1:
+                del carry[col]
+            else:
+                carry[col][1] = left - 1
+            col += 1
+
+    for text, rowspan, colspan in cells:
+        take_carried()
+        for _ in range(colspan):
+            row.append(text)
+            if rowspan > 1:
+                carry[col] = [text, rowspan - 1]
+            col += 1
+    take_carried()
+
+    # columns still spanned from above past the end of this row
+    if carry and max(carry) >= col:
+        for c in range(col, max(carry) + 1):
+            if c in carry:
+                text, left = carry[c]
+                row.append(text)
+                if left == 1:
+                    del carry[c]
+                else:
+                    carry[c][1] = left - 1
+            else:
+                row.append("")
+    return row
+
+
+def parse_table_html(html):
+    """Rows (lists of cell text) of every <tr> in `html`, spans expanded."""
+    rows = []
+    carry = {}
+    row_cells = None      # cells of the open <tr>
+    cell = None           # [text pieces, rowspan, colspan] of the open <td>/<th>
+
+    def close_cell():
+        nonlocal cell
+        if cell is not None and row_cells is not None:
+            row_cells.append(("".join(cell[0]), cell[1], cell[2]))
+        cell = None
+
+    def close_row():
+        nonlocal row_cells
+        close_cell()
+        if row_cells is not None:
+            row = _layout_row(row_cells, carry)
+            if row:
+                rows.append(row)
+        row_cells = None
+
+    pos = 0
+    for match in TAG.finditer(html):
+        if cell is not None and match.start() > pos:
+            text = html[pos:match.start()]
+            if "&" in text:
+                text = unescape(text)
+            text = text.strip()
+            if text:
+                cell[0].append(text)
+        pos = match.end()
+
+        closing, name, attrs = match.groups()
+        if name is None:
+            continue
+        name = name.lower()
+
+        if name in ("td", "th"):
+            close_cell()
+            # like find_all("tr"), cells outside a row are ignored
+            if not closing and row_cells is not None:
+                rowspan, colspan = _spans(attrs)
+                cell = [[], rowspan, colspan]
+        elif name == "tr":
+            close_row()
+            if not closing:
+                row_cells = []
+        elif name == "table":
+            close_row()
+            # spans never cross table boundaries
+            carry.clear()
+
+    if cell is not None and len(html) > pos:
+        text = unescape(html[pos:]).strip()
+        if text:
+            cell[0].append(text)
+    close_row()
+    return rows
+
+
+def extract_key_value_pairs(table_data):
+    """
+    Convert PaddleOCR PP-Structure result into key-value pairs: the first
+    row of every table is the header, each following row becomes a dict.
+    """
+    final_tables = []
+    for entry in table_data:
+        if "html" not in entry:
+            continue
+
+        rows = parse_table_html(entry["html"])
+        if not rows:
+            continue
+
+        header = rows[0]
+        final_tables.append([dict(zip(header, row)) for row in rows[1:]])
+
+    return final_tables